@@ -0,0 +1,136 @@
+"""
+Social Media Archive - Local t.co Stand-in Server
+
+A local HTTP server that answers like t.co: every /<code> request is redirected to
+/target/<code>, which answers 200. Latency and failures are configurable, so URL
+resolution can be benchmarked without touching the real t.co. Point the scripts at
+it with --resolve-base-url.
+
+Example:
+  python benchmarks/fake_tco_server.py --port 8765 --latency-ms 80 --failure-rate 0.05
+  python url_extraction.py --db-path bench.sqlite3 --tweet-table tweet --resolve-base-url http://127.0.0.1:8765
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTcoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        code = self.path.strip("/")
+        if code.startswith("target/"):
+            self.respond(200)
+        elif random.random() < server.error_rate:
+            # Transient error, the resolver should retry
+            self.respond(503)
+        elif zlib.crc32(code.encode()) % 10000 < server.failure_rate * 10000:
+            # Permanently broken link, the same code always fails
+            self.respond(404)
+        else:
+            self.respond(301, {"Location": f"/target/{code}"})
+
+    do_GET = do_HEAD
+
+    def respond(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTcoServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=50, jitter_ms=0, failure_rate=0.05, error_rate=0.0):
+        """Initialize the stand-in server.
+
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on (0 picks a free port)
+            latency_ms (float): Delay added to every response
+            jitter_ms (float): Random extra delay of up to this many milliseconds
+            failure_rate (float): Fraction of codes that always answer 404
+            error_rate (float): Fraction of requests that answer 503
+        """
+        self.httpd = ThreadingHTTPServer((host, port), FakeTcoHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency_ms / 1000
+        self.httpd.jitter = jitter_ms / 1000
+        self.httpd.failure_rate = failure_rate
+        self.httpd.error_rate = error_rate
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Main function to handle command line arguments and run the server."""
+    parser = argparse.ArgumentParser(description="Run a local stand-in for t.co")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Delay of every response (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra delay (default: 0)")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Fraction of links that are broken (default: 0.05)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answering 503 (default: 0)")
+    args = parser.parse_args()
+
+    server = FakeTcoServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.failure_rate, args.error_rate)
+    print(f"Serving fake t.co on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
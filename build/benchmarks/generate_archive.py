@@ -0,0 +1,166 @@
+"""
+Social Media Archive - Synthetic Archive Generator
+
+Creates an SQLite database with a synthetic tweet table for benchmarking the build
+scripts. The table has the columns of the `tweets` collection schema in
+src/content.config.ts plus "text", and the tweets contain t.co links at a
+configurable density.
+
+Example:
+  python benchmarks/generate_archive.py --db-path bench.sqlite3 --tweets 1000000 --links-per-tweet 0.7
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import string
+import time
+from datetime import datetime, timedelta
+
+WORDS = (
+    "freifunk", "netz", "router", "mesh", "community", "workshop", "firmware",
+    "knoten", "treffen", "update", "offen", "frei", "wlan", "gluon", "batman",
+    "für", "alle", "heute", "abend", "neue", "version", "über", "straße", "München",
+    "the", "network", "is", "free", "and", "open", "to", "everyone", "join", "us",
+)
+PUNCTUATION = ("", "", "", ".", ",", "!", ")")
+CODE_ALPHABET = string.ascii_letters + string.digits
+
+TWEET_COLUMNS = (
+    ("id", "INTEGER PRIMARY KEY"),
+    ("username", "TEXT"),
+    ("tweetID", "TEXT"),
+    ("conversationID", "TEXT"),
+    ("createdAt", "TEXT"),
+    ("likeCount", "INTEGER"),
+    ("quoteCount", "INTEGER"),
+    ("replyCount", "INTEGER"),
+    ("retweetCount", "INTEGER"),
+    ("isLiked", "INTEGER"),
+    ("isRetweeted", "INTEGER"),
+    ("path", "TEXT"),
+    ("text", "TEXT"),
+    ("addedToDatabaseAt", "TEXT"),
+    ("archivedAt", "TEXT"),
+    ("deletedAt", "TEXT"),
+    ("isBookmarked", "INTEGER"),
+    ("deletedTweetAt", "TEXT"),
+    ("deletedRetweetAt", "TEXT"),
+    ("deletedLikeAt", "TEXT"),
+    ("deletedBookmarkAt", "TEXT"),
+)
+
+
+def make_link_pool(rng, size):
+    """Create the t.co links tweets draw from, so links repeat across tweets."""
+    return [f"https://t.co/{''.join(rng.choices(CODE_ALPHABET, k=10))}" for _ in range(size)]
+
+
+def make_text(rng, links):
+    """Create a tweet text of random words with the given links mixed in."""
+    words = rng.choices(WORDS, k=rng.randint(5, 35))
+    for link in links:
+        words.insert(rng.randint(0, len(words)), link + rng.choice(PUNCTUATION))
+    return " ".join(words)
+
+
+def generate_archive(db_path, tweets=10000, links_per_tweet=0.7, unique_link_ratio=0.8,
+                     deleted_ratio=0.02, table='tweet', seed=42, batch_size=10000):
+    """Generate a synthetic tweet archive.
+
+    Args:
+        db_path (str): Path of the SQLite database to create (overwritten if it exists)
+        tweets (int): Number of tweets
+        links_per_tweet (float): Average number of t.co links per tweet
+        unique_link_ratio (float): Unique links as a fraction of all links
+        deleted_ratio (float): Fraction of tweets with a deletedAt timestamp
+        table (str): Name of the tweet table
+        seed (int): Random seed, the same arguments always create the same archive
+        batch_size (int): Number of rows inserted per transaction
+
+    Returns:
+        dict: Number of tweets, links and unique links
+    """
+    rng = random.Random(seed)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    link_pool = make_link_pool(rng, max(1, int(tweets * links_per_tweet * unique_link_ratio)))
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE {table} ({', '.join(f'{name} {kind}' for name, kind in TWEET_COLUMNS)})")
+
+    start = datetime(2012, 1, 1)
+    placeholders = ", ".join("?" for _ in TWEET_COLUMNS)
+    link_count = 0
+    rows = []
+
+    for i in range(1, tweets + 1):
+        # Spread the links so the average per tweet is links_per_tweet
+        count = int(links_per_tweet) + (1 if rng.random() < links_per_tweet % 1 else 0)
+        links = rng.choices(link_pool, k=count)
+        link_count += count
+
+        tweet_id = str(1000000000000000000 + i)
+        created = start + timedelta(minutes=i * 7)
+        deleted = created + timedelta(days=30) if rng.random() < deleted_ratio else None
+        rows.append((
+            i, "freifunk", tweet_id, tweet_id,
+            created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            rng.randint(0, 200), rng.randint(0, 10), rng.randint(0, 20), rng.randint(0, 50),
+            0, 0, f"/freifunk/status/{tweet_id}",
+            make_text(rng, links),
+            "2024-06-01T00:00:00.000Z", None,
+            deleted.strftime("%Y-%m-%dT%H:%M:%S.000Z") if deleted else None,
+            0, None, None, None, None,
+        ))
+
+        if len(rows) >= batch_size:
+            conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+            conn.commit()
+            rows = []
+
+    if rows:
+        conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+    conn.commit()
+    conn.close()
+
+    return {'tweets': tweets, 'links': link_count, 'unique_links': len(link_pool)}
+
+
+def main():
+    """Main function to handle command line arguments and generate the archive."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic tweet archive for benchmarks")
+    parser.add_argument("--db-path", type=str, required=True, help="Path of the SQLite database to create")
+    parser.add_argument("--tweets", type=int, default=10000, help="Number of tweets (default: 10000)")
+    parser.add_argument("--links-per-tweet", type=float, default=0.7, help="Average t.co links per tweet (default: 0.7)")
+    parser.add_argument("--unique-link-ratio", type=float, default=0.8, help="Unique links as a fraction of all links (default: 0.8)")
+    parser.add_argument("--deleted-ratio", type=float, default=0.02, help="Fraction of deleted tweets (default: 0.02)")
+    parser.add_argument("--tweet-table", type=str, default="tweet", help="Name of the tweet table (default: tweet)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args()
+
+    started = time.time()
+    result = generate_archive(args.db_path, args.tweets, args.links_per_tweet, args.unique_link_ratio,
+                              args.deleted_ratio, args.tweet_table, args.seed)
+    print(f"Created {args.db_path}: {result['tweets']} tweets, {result['links']} t.co links "
+          f"({result['unique_links']} unique) in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Social Media Archive - Benchmark Runner
+
+Generates synthetic archives, runs every stage of the build against them and
+reports throughput and peak memory per stage. URL resolution runs against the
+local stand-in server from fake_tco_server.py, never against the real t.co.
+
+Each stage runs in a fresh process, so its peak memory is measured on its own.
+Results are written as JSON named after the time and git commit, and can be
+compared with an earlier run using --compare.
+
+Stages:
+  resolve       url_extraction.py on a fresh archive (URLs/s)
+  export        sql_extraction.py with one process (rows/s, files/s)
+  export_pool   sql_extraction.py with --workers (rows/s, files/s)
+  incremental   sql_extraction.py --incremental over an unchanged export (rows/s)
+  search_index  sql_extraction.py with --search-index-dir (rows/s, index size)
+  export_bulk   sql_extraction.py --output-format json, one file per month (rows/s)
+  pipeline      build_archive.py resolving and exporting in one pass (rows/s, URLs/s)
+
+Example:
+  python benchmarks/run_benchmarks.py --tweets 10000 100000 --latency-ms 20
+  python benchmarks/run_benchmarks.py --stages export export_pool --compare benchmarks/results/old.json
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.dirname(BENCHMARK_DIR)
+# The build scripts are plain modules in build/, make them importable
+# here and in the spawned stage processes
+sys.path.insert(0, BUILD_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_tco_server import FakeTcoServer
+from generate_archive import generate_archive
+
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+RESULTS_VERSION = 1
+STAGES = ('resolve', 'export', 'export_pool', 'incremental', 'search_index', 'export_bulk', 'pipeline')
+OUTPUT_EXTENSIONS = ('.md', '.json', '.ndjson')
+THROUGHPUT_METRICS = ('rows_per_second', 'urls_per_second', 'files_per_second')
+# Stages that stream the archive, their peak memory must not grow with its size
+MEMORY_BOUNDED_STAGES = ('export', 'export_pool', 'search_index')
+TWEET_TABLE = 'tweet'
+URL_TABLE = 'resolved_urls'
+
+
+def peak_memory_mb(who):
+    """Peak resident memory of this process or of its finished child processes in MiB.
+
+    On Linux, ru_maxrss of a process started with fork and exec also counts the
+    memory of its parent before the exec, so a stage process would report the
+    memory the runner used for generating a large archive. The peak of this
+    process is therefore read from VmHWM in /proc/self/status, which starts
+    over at the exec.
+    """
+    if who == resource.RUSAGE_SELF and os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def count_files(directory):
+    """Count the markdown and data files in a directory."""
+    with os.scandir(directory) as entries:
+        return sum(1 for entry in entries if entry.name.endswith(OUTPUT_EXTENSIONS))
+
+
+def count_resolved(db_path):
+    """Count the resolved and failed URLs in the resolved_urls table."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT status = 'SUCCESS', COUNT(*) FROM {URL_TABLE} GROUP BY 1").fetchall()
+    finally:
+        conn.close()
+    counts = dict(rows)
+    return counts.get(1, 0), counts.get(0, 0)
+
+
+def run_stage(stage, db_path, output_dir, settings):
+    """Run one stage in the current process and measure it.
+
+    Called in a fresh process for every stage, see measure_stage().
+
+    Args:
+        stage (str): Name of the stage, one of STAGES
+        db_path (str): Archive the stage reads (and may write resolved URLs to)
+        output_dir (str): Directory for markdown files
+        settings (dict): Benchmark settings (workers, chunk size, server URL...)
+
+    Returns:
+        dict: Measurements of the stage
+    """
+    import build_archive
+    import url_extraction
+    from sql_extraction import TwitterToMarkdownExporter
+
+    resolve_options = {
+        'workers': settings['resolve_workers'],
+        'timeout': settings['timeout'],
+        'max_retries': settings['max_retries'],
+        'requests_per_second': 0,
+        'base_url': settings['base_url'],
+    }
+    exporter = None
+
+    # The scripts print progress for every URL and file, keep that out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        if stage == 'resolve':
+            metrics = url_extraction.main(db_path, TWEET_TABLE, URL_TABLE, chunk_size=settings['chunk_size'],
+                                          **resolve_options)
+        elif stage == 'pipeline':
+            metrics = build_archive.main(db_path, TWEET_TABLE, output_dir, URL_TABLE, settings['chunk_size'],
+                                         render_workers=settings['render_workers'], **resolve_options)
+        else:
+            exporter = TwitterToMarkdownExporter(db_path)
+            metrics = exporter.metrics
+            exporter.export_to_markdown(
+                TWEET_TABLE, output_dir, URL_TABLE, settings['chunk_size'],
+                workers=settings['render_workers'] if stage == 'export_pool' else 1,
+                incremental=stage == 'incremental',
+                search_index_dir=os.path.join(output_dir, 'search-index') if stage == 'search_index' else None,
+                output_format='json' if stage == 'export_bulk' else 'markdown'
+            )
+        seconds = time.perf_counter() - started
+
+    result = {
+        'seconds': round(seconds, 3),
+        'peak_memory_mb': peak_memory_mb(resource.RUSAGE_SELF),
+        'peak_worker_memory_mb': peak_memory_mb(resource.RUSAGE_CHILDREN),
+        # Seconds per phase as recorded by the scripts themselves (see metrics.py)
+        'phases': {name: round(seconds, 3) for name, (seconds, _) in metrics.phases.items()},
+    }
+    if stage in ('resolve', 'pipeline'):
+        # Stages start from an archive without resolved URLs, so every row is from this run
+        resolved, failed = count_resolved(db_path)
+        result['urls'] = resolved + failed
+        result['urls_failed'] = failed
+        result['urls_per_second'] = round(result['urls'] / seconds, 1)
+    if stage != 'resolve':
+        rows = exporter.stats['total_tweets'] if exporter else settings['tweets']
+        result['rows'] = rows
+        result['rows_per_second'] = round(rows / seconds, 1)
+        result['files'] = count_files(output_dir)
+        if stage != 'incremental':
+            result['files_per_second'] = round(result['files'] / seconds, 1)
+    if stage == 'search_index':
+        # Size of the index as reported by SearchIndexBuilder.write()
+        result['index_bytes'] = metrics.counters.get('search_index_bytes', 0)
+        result['index_terms'] = metrics.counters.get('search_index_terms', 0)
+        result['index_term_shards'] = metrics.counters.get('search_index_term_shards', 0)
+        result['index_posting_files'] = metrics.counters.get('search_index_posting_files', 0)
+    return result
+
+
+def measure_stage(stage, db_path, output_dir, settings):
+    """Run a stage in a freshly spawned process, so peak memory is its own."""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_stage, stage, db_path, output_dir, settings).result()
+
+
+def prepare_stage(stage, work_dir, archive_path, resolved_path):
+    """Set up the database and output directory a stage starts from.
+
+    Args:
+        stage (str): Name of the stage
+        work_dir (str): Scratch directory of this archive size
+        archive_path (str): Generated archive without resolved URLs
+        resolved_path (str): Archive after the resolve stage (None if it did not run)
+
+    Returns:
+        tuple: (database path, output directory)
+    """
+    db_path = os.path.join(work_dir, f"{stage}.sqlite3")
+    output_dir = os.path.join(work_dir, f"{stage}-output")
+    if stage in ('resolve', 'pipeline') or not resolved_path:
+        shutil.copyfile(archive_path, db_path)
+    else:
+        shutil.copyfile(resolved_path, db_path)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    if stage == 'incremental':
+        # Export once, the measured run then finds every file unchanged
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            from sql_extraction import TwitterToMarkdownExporter
+            TwitterToMarkdownExporter(db_path).export_to_markdown(
+                TWEET_TABLE, output_dir, URL_TABLE, incremental=True
+            )
+    return db_path, output_dir
+
+
+def run_size(tweets, stages, settings, work_dir, repeat):
+    """Generate an archive of the given size and benchmark the selected stages on it.
+
+    Returns:
+        list: One result dict per stage
+    """
+    archive_path = os.path.join(work_dir, "archive.sqlite3")
+    started = time.perf_counter()
+    archive = generate_archive(archive_path, tweets, settings['links_per_tweet'],
+                               settings['unique_link_ratio'], table=TWEET_TABLE, seed=settings['seed'])
+    generate_seconds = time.perf_counter() - started
+    print(f"Generated {tweets} tweets with {archive['links']} t.co links "
+          f"({archive['unique_links']} unique) in {generate_seconds:.2f}s")
+
+    results = []
+    resolved_path = None
+    settings = dict(settings, tweets=tweets)
+
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+
+        runs = []
+        for _ in range(repeat):
+            db_path, output_dir = prepare_stage(stage, work_dir, archive_path, resolved_path)
+            runs.append(measure_stage(stage, db_path, output_dir, settings))
+        if stage == 'resolve':
+            # The export stages start from the archive with resolved URLs
+            resolved_path = db_path
+
+        # Report the run with the median time, so one slow run does not skew the result
+        runs.sort(key=lambda run: run['seconds'])
+        result = dict(stage=stage, tweets=tweets, links=archive['links'],
+                      unique_links=archive['unique_links'], **runs[len(runs) // 2])
+        if repeat > 1:
+            result['all_seconds'] = [run['seconds'] for run in runs]
+        results.append(result)
+        print_result(result)
+
+    return results
+
+
+def print_result(result):
+    """Print the measurements of one stage as a single line."""
+    parts = [f"{result['stage']:<13} {result['tweets']:>9} tweets {result['seconds']:>9.2f}s"]
+    for metric, label in (('rows_per_second', 'rows/s'), ('urls_per_second', 'URLs/s'),
+                          ('files_per_second', 'files/s')):
+        if metric in result:
+            parts.append(f"{result[metric]:>10.1f} {label}")
+    if 'index_bytes' in result:
+        parts.append(f"index {result['index_bytes'] / 1024 / 1024:.1f} MiB")
+    parts.append(f"peak {result['peak_memory_mb']:.1f} MiB")
+    if result['peak_worker_memory_mb']:
+        parts.append(f"workers {result['peak_worker_memory_mb']:.1f} MiB")
+    print("  ".join(parts))
+
+
+def git_commit():
+    """Return the current commit hash and whether the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BUILD_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BUILD_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def compare_results(previous, current):
+    """Print the throughput, memory and index size change of every stage against an earlier result file."""
+    before = {(result['stage'], result['tweets']): result for result in previous['stages']}
+    print(f"Compared with {previous['commit']} ({previous['timestamp']}):")
+    for result in current['stages']:
+        old = before.get((result['stage'], result['tweets']))
+        if not old:
+            continue
+        for metric in THROUGHPUT_METRICS + ('peak_memory_mb', 'index_bytes'):
+            if metric in result and old.get(metric):
+                change = (result[metric] - old[metric]) / old[metric] * 100
+                print(f"  {result['stage']:<13} {result['tweets']:>9} tweets  {metric:<17} "
+                      f"{old[metric]:>10.1f} -> {result[metric]:>10.1f}  ({change:+.1f}%)")
+
+
+def check_memory_growth(results, max_growth_mb):
+    """Check that the streaming stages use about the same memory for every archive size.
+
+    Compares the peak memory of each stage in MEMORY_BOUNDED_STAGES on the
+    smallest and the largest archive.
+
+    Args:
+        results (list): Result dicts of all stages and sizes
+        max_growth_mb (float): Allowed increase of the peak memory in MiB
+
+    Returns:
+        bool: True if no stage grew by more than max_growth_mb
+    """
+    passed = True
+    for stage in MEMORY_BOUNDED_STAGES:
+        runs = sorted((result for result in results if result['stage'] == stage), key=lambda result: result['tweets'])
+        if len(runs) < 2:
+            continue
+        smallest, largest = runs[0], runs[-1]
+        growth = largest['peak_memory_mb'] - smallest['peak_memory_mb']
+        ok = growth <= max_growth_mb
+        passed = passed and ok
+        print(f"  {stage:<13} peak {smallest['peak_memory_mb']:.1f} MiB at {smallest['tweets']} tweets, "
+              f"{largest['peak_memory_mb']:.1f} MiB at {largest['tweets']} tweets "
+              f"({growth:+.1f} MiB, limit {max_growth_mb:.1f}): {'ok' if ok else 'FAILED'}")
+    return passed
+
+
+def main():
+    """Main function to handle command line arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the build scripts on synthetic archives",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmarks/run_benchmarks.py
+  python benchmarks/run_benchmarks.py --tweets 10000 1000000 --stages export export_pool
+  python benchmarks/run_benchmarks.py --compare benchmarks/results/20250101-120000-abc1234.json
+  python benchmarks/run_benchmarks.py --tweets 10000 200000 --stages export export_pool search_index --max-memory-growth 20
+        """
+    )
+    parser.add_argument("--tweets", type=int, nargs="+", default=[10000], help="Archive sizes to benchmark (default: 10000)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Stages to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage, the median is reported (default: 1)")
+    parser.add_argument("--links-per-tweet", type=float, default=0.7, help="Average t.co links per tweet (default: 0.7)")
+    parser.add_argument("--unique-link-ratio", type=float, default=0.8, help="Unique links as a fraction of all links (default: 0.8)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generated archives (default: 42)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Response delay of the fake t.co server (default: 20)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra delay of the fake t.co server (default: 0)")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Fraction of broken links (default: 0.05)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answering 503 (default: 0)")
+    parser.add_argument("--resolve-workers", type=int, default=16, help="Concurrent URL resolutions (default: 16)")
+    parser.add_argument("--render-workers", type=int, default=0, help="Processes of the export_pool and pipeline stages, 0 = one per CPU core (default: 0)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows read at a time (default: 1000)")
+    parser.add_argument("--work-dir", type=str, help="Keep the generated archives and exports here (default: temporary directory)")
+    parser.add_argument("--output", type=str, help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=str, help="Earlier result file to compare with")
+    parser.add_argument("--max-memory-growth", type=float, help="Fail if the peak memory of the export stages grows by more than this many MiB between the smallest and largest archive")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    timestamp = datetime.now()
+    settings = {
+        'links_per_tweet': args.links_per_tweet,
+        'unique_link_ratio': args.unique_link_ratio,
+        'seed': args.seed,
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'failure_rate': args.failure_rate,
+        'error_rate': args.error_rate,
+        'resolve_workers': args.resolve_workers,
+        'render_workers': args.render_workers or os.cpu_count() or 1,
+        'chunk_size': args.chunk_size,
+        'timeout': 10,
+        'max_retries': 3,
+    }
+
+    print(f"Benchmarking commit {commit}{' (uncommitted changes)' if dirty else ''}")
+    print("-" * 80)
+
+    results = []
+    work_root = args.work_dir or tempfile.mkdtemp(prefix="archive-benchmark-")
+    server = FakeTcoServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           failure_rate=args.failure_rate, error_rate=args.error_rate)
+    try:
+        with server:
+            settings['base_url'] = server.base_url
+            for tweets in args.tweets:
+                work_dir = os.path.join(work_root, str(tweets))
+                os.makedirs(work_dir, exist_ok=True)
+                results.extend(run_size(tweets, args.stages, settings, work_dir, args.repeat))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': timestamp.isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {key: value for key, value in settings.items() if key != 'base_url'},
+        'stages': results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{timestamp.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print("-" * 80)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), report)
+
+    if args.max_memory_growth is not None:
+        print("Peak memory by archive size:")
+        if not check_memory_growth(results, args.max_memory_growth):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
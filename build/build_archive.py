@@ -0,0 +1,303 @@
+"""
+Social Media Archive - Combined URL Resolution and Markdown Export
+
+This script runs url_extraction.py and sql_extraction.py in a single pass over the
+tweet table. Every chunk of tweets read for the export is first checked for t.co
+links that are not resolved yet; those are resolved, saved to the resolved_urls
+table and used right away when the chunk is written as markdown files.
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+
+import url_extraction
+from metrics import Metrics, add_metrics_arguments, collect_metrics
+from bulk_output import BULK_GROUPS, DEFAULT_TWEETS_PER_FILE
+from sql_extraction import TwitterToMarkdownExporter, DEFAULT_CHUNK_SIZE, MARKDOWN_LAYOUTS, OUTPUT_FORMATS
+from tco_links import find_tco_urls
+from url_extraction import (
+    DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT_SECONDS, DEFAULT_MAX_RETRIES,
+    DEFAULT_REQUESTS_PER_SECOND, DEFAULT_RETRY_FAILED_AFTER_HOURS, DEFAULT_MAX_FAILED_ATTEMPTS,
+    HostRateLimiter, create_session, flush_results, init_resolved_urls_table,
+    load_resolution_state, resolve_tco_urls_concurrently, select_urls_to_resolve
+)
+
+
+class ChunkResolver:
+    def __init__(self, exporter, url_table, failed, workers=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT_SECONDS, max_retries=DEFAULT_MAX_RETRIES,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, base_url=None,
+                 retry_failed_after_hours=DEFAULT_RETRY_FAILED_AFTER_HOURS,
+                 max_failed_attempts=DEFAULT_MAX_FAILED_ATTEMPTS):
+        """Initialize the resolver that runs on every chunk of the export.
+
+        Args:
+            exporter (TwitterToMarkdownExporter): Exporter whose url_map is extended
+            url_table (str): Name of the table storing resolved URLs
+            failed (dict): Failed URLs mapped to (days with a failed attempt, last attempt timestamp)
+            workers (int): Number of URLs resolved at the same time
+            timeout (float): Timeout in seconds for each HTTP request
+            max_retries (int): Retries per URL after a network error or HTTP 429/5xx
+            requests_per_second (float): Maximum request rate per host
+            base_url (str): Optional stand-in server used instead of https://t.co
+            retry_failed_after_hours (float): Minimum age of a failed attempt before retrying
+            max_failed_attempts (int): Stop retrying a URL after this many failed attempts
+        """
+        self.exporter = exporter
+        self.url_table = url_table
+        self.failed = failed
+        self.workers = workers
+        self.retry_failed_after_hours = retry_failed_after_hours
+        self.max_failed_attempts = max_failed_attempts
+        self.resolve_options = {
+            'session': create_session(pool_size=workers),
+            'timeout': timeout,
+            'max_retries': max_retries,
+            'rate_limiter': HostRateLimiter(requests_per_second),
+            'base_url': base_url,
+            'metrics': exporter.metrics,
+        }
+        # URLs already looked at in this run, so each one is requested at most once
+        self.seen = set()
+        self.stats = {
+            'resolved': 0,
+            'failed': 0,
+            'skipped_failed': 0
+        }
+
+    def __call__(self, rows, conn):
+        """Resolve the new t.co links of a chunk of tweets before it is exported.
+
+        Args:
+            rows (list): Tweet rows of the chunk
+            conn (sqlite3.Connection): Connection the export reads from, used for the writes
+        """
+        new_urls = {}
+        for data in rows:
+            for short_url in find_tco_urls(data.get('text')):
+                if short_url not in self.exporter.url_map and short_url not in self.seen:
+                    new_urls[short_url] = None
+
+        if not new_urls:
+            return
+        self.seen.update(new_urls)
+
+        to_resolve, _, skipped_failed = select_urls_to_resolve(
+            new_urls, set(), self.failed, self.retry_failed_after_hours, self.max_failed_attempts
+        )
+        self.stats['skipped_failed'] += skipped_failed
+        if not to_resolve:
+            return
+
+        # Let the Ctrl+C handler of url_extraction save what was resolved so far
+        url_extraction.connections['main'] = conn
+        url_extraction.pending_table = self.url_table
+
+        metrics = self.exporter.metrics
+        try:
+            with metrics.phase('resolve'):
+                for result in resolve_tco_urls_concurrently(to_resolve, self.workers, **self.resolve_options):
+                    url_extraction.pending_results.append(result)
+                    if result['status'] == 'SUCCESS':
+                        self.exporter.url_map[result['original_url']] = result['resolved_url']
+                        self.stats['resolved'] += 1
+                    else:
+                        self.stats['failed'] += 1
+        finally:
+            # Also save what was resolved when resolving stops with an error
+            with metrics.phase('url_write'):
+                flush_results(conn, self.url_table)
+
+        metrics.sample_throughput('urls', self.stats['resolved'] + self.stats['failed'])
+        if not self.exporter.quiet:
+            print(f"Resolved {self.stats['resolved']} new t.co URLs so far ({self.stats['failed']} failed)")
+
+    def close(self):
+        """Close the HTTP session."""
+        self.resolve_options['session'].close()
+
+
+def main(db_path, tweet_table, output_dir, url_table='resolved_urls', chunk_size=DEFAULT_CHUNK_SIZE,
+         render_workers=1, incremental=False, since_last_run=False, delete_orphans=False,
+         manifest_path=None, search_index_dir=None, output_format='markdown', group_by='month',
+         tweets_per_file=DEFAULT_TWEETS_PER_FILE, layout='flat', resolve=True, quiet=False, metrics=None,
+         **resolve_options):
+    """Resolve new t.co links and export all tweets in one pass over the tweet table.
+
+    Args:
+        db_path (str): Path to the SQLite database containing tweets and resolved URLs
+        tweet_table (str): Name of the table containing tweet data
+        output_dir (str): Directory to save markdown files
+        url_table (str): Name of the table storing resolved URLs
+        chunk_size (int): Number of rows read and resolved at a time
+        render_workers (int): Number of processes rendering and writing files
+        incremental, since_last_run, delete_orphans, manifest_path, search_index_dir,
+        output_format, group_by, tweets_per_file, layout:
+            See TwitterToMarkdownExporter.export_to_markdown()
+        resolve (bool): Resolve new t.co links (False only exports with the known mappings)
+        quiet (bool): Only print the start and the summaries, no progress
+        metrics (Metrics): Metrics to record into (a new one is created if None)
+        **resolve_options: Passed on to ChunkResolver
+
+    Returns:
+        Metrics: Timings per phase, counters and HTTP latencies of the run
+    """
+    # Make sure the table exists and load the retry state of failed URLs once
+    conn = sqlite3.connect(db_path)
+    cursor = init_resolved_urls_table(conn, url_table)
+    _, failed = load_resolution_state(cursor, url_table)
+    conn.close()
+
+    exporter = TwitterToMarkdownExporter(db_path)
+    exporter.metrics = metrics or Metrics('build_archive')
+    exporter.quiet = quiet
+    resolver = ChunkResolver(exporter, url_table, failed, **resolve_options)
+    if resolve:
+        exporter.chunk_hook = resolver
+    else:
+        print("URL resolution is disabled, exporting with the already resolved URLs")
+
+    try:
+        exporter.export_to_markdown(
+            tweet_table, output_dir, url_table, chunk_size, render_workers,
+            incremental=incremental,
+            since_last_run=since_last_run,
+            delete_orphans=delete_orphans,
+            manifest_path=manifest_path,
+            search_index_dir=search_index_dir,
+            output_format=output_format,
+            group_by=group_by,
+            tweets_per_file=tweets_per_file,
+            layout=layout
+        )
+    finally:
+        resolver.close()
+        url_extraction.connections.clear()
+
+    print("URL Resolution Summary:")
+    print(f"  New t.co URLs resolved: {resolver.stats['resolved']}")
+    print(f"  New t.co URLs failed: {resolver.stats['failed']}")
+    print(f"  Failed t.co URLs not due for retry: {resolver.stats['skipped_failed']}")
+
+    exporter.metrics.sample_throughput('urls', resolver.stats['resolved'] + resolver.stats['failed'], force=True)
+    exporter.metrics.update_counters({
+        'urls_resolved': resolver.stats['resolved'],
+        'urls_resolve_failed': resolver.stats['failed'],
+        'urls_skipped_failed': resolver.stats['skipped_failed'],
+    })
+    return exporter.metrics
+
+
+def cli_main():
+    """Main function to handle command line arguments and run the combined pipeline."""
+    parser = argparse.ArgumentParser(
+        description="Resolve new t.co URLs and export tweets to markdown in a single pass",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python build_archive.py --db-path data.sqlite3 --tweet-table tweet --output-dir ../src/content/tweets
+  python build_archive.py --config config.json --incremental --render-workers 0
+        """
+    )
+
+    parser.add_argument("--db-path", type=str, help="Path to the SQLite database file containing tweets and resolved URLs")
+    parser.add_argument("--tweet-table", type=str, help="Name of the table containing tweet data")
+    parser.add_argument("--url-table", type=str, default="resolved_urls", help="Name of the table storing resolved URLs (default: resolved_urls)")
+    parser.add_argument("--output-dir", type=str, help="Directory to save the exported markdown files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"Number of rows read and resolved at a time (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_CONCURRENCY, help=f"Number of URLs resolved concurrently (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--render-workers", type=int, default=1, help="Number of processes rendering markdown, 0 = one per CPU core (default: 1)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS, help=f"Timeout in seconds for each HTTP request (default: {DEFAULT_TIMEOUT_SECONDS})")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help=f"Retries per URL (default: {DEFAULT_MAX_RETRIES})")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_REQUESTS_PER_SECOND, help=f"Maximum requests per second to a single host (default: {DEFAULT_REQUESTS_PER_SECOND})")
+    parser.add_argument("--retry-failed-after", type=float, default=DEFAULT_RETRY_FAILED_AFTER_HOURS, help=f"Retry FAILED URLs after this many hours (default: {DEFAULT_RETRY_FAILED_AFTER_HOURS})")
+    parser.add_argument("--max-failed-attempts", type=int, default=DEFAULT_MAX_FAILED_ATTEMPTS, help=f"Give up on a URL after failed attempts on this many days (default: {DEFAULT_MAX_FAILED_ATTEMPTS})")
+    parser.add_argument("--resolve-base-url", type=str, help="Send requests to this base URL instead of https://t.co (for testing)")
+    parser.add_argument("--incremental", action="store_true", help="Only rewrite files whose content changed")
+    parser.add_argument("--since-last-run", action="store_true", help="Only export tweets added or deleted since the last incremental run")
+    parser.add_argument("--delete-orphans", action="store_true", help="Delete files of tweets that are no longer in the database")
+    parser.add_argument("--manifest", type=str, help="Path of the incremental export manifest")
+    parser.add_argument("--search-index-dir", type=str, help="Also build the prebuilt search index into this directory")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="markdown", help="One markdown file per tweet, or json/ndjson data files (default: markdown)")
+    parser.add_argument("--group-by", choices=BULK_GROUPS, default="month", help="One data file per month or per --tweets-per-file tweets (default: month)")
+    parser.add_argument("--tweets-per-file", type=int, default=DEFAULT_TWEETS_PER_FILE, help=f"Tweets per data file with --group-by count (default: {DEFAULT_TWEETS_PER_FILE})")
+    parser.add_argument("--layout", choices=MARKDOWN_LAYOUTS, default="flat", help="Markdown files in the output directory or in hashed subdirectories (default: flat)")
+    parser.add_argument("--config", type=str, help="Path to JSON configuration file (optional, overrides other arguments if provided)")
+    add_metrics_arguments(parser)
+
+    args = parser.parse_args()
+
+    db_path, tweet_table, url_table, output_dir = args.db_path, args.tweet_table, args.url_table, args.output_dir
+    resolution = {}
+    output = {}
+
+    # Load config from file if provided
+    if args.config:
+        if not os.path.exists(args.config):
+            print(f"Error: Config file not found: {args.config}")
+            return
+
+        try:
+            with open(args.config, 'r') as f:
+                config = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON in config file: {e}")
+            return
+
+        db_path = config.get('database', {}).get('path', db_path)
+        tweet_table = config.get('database', {}).get('tweet_table', tweet_table)
+        url_table = config.get('database', {}).get('url_table', url_table)
+        output = config.get('output', {})
+        output_dir = output.get('directory', output_dir)
+        resolution = config.get('url_resolution', {})
+
+    if not db_path or not tweet_table or not output_dir:
+        print("Error: --db-path, --tweet-table and --output-dir (or a config file containing them) are required")
+        return
+
+    with collect_metrics(Metrics('build_archive'), args) as metrics:
+        main(
+            db_path, tweet_table, output_dir, url_table,
+            chunk_size=args.chunk_size,
+            render_workers=output.get('workers', args.render_workers) or os.cpu_count() or 1,
+            incremental=output.get('incremental', args.incremental),
+            since_last_run=output.get('since_last_run', args.since_last_run),
+            delete_orphans=output.get('delete_orphans', args.delete_orphans),
+            manifest_path=output.get('manifest', args.manifest),
+            search_index_dir=output.get('search_index_directory', args.search_index_dir),
+            output_format=output.get('format', args.output_format),
+            group_by=output.get('group_by', args.group_by),
+            tweets_per_file=output.get('tweets_per_file', args.tweets_per_file),
+            layout=output.get('layout', args.layout),
+            resolve=resolution.get('enabled', True),
+            workers=resolution.get('concurrency', args.workers),
+            timeout=resolution.get('timeout_seconds', args.timeout),
+            max_retries=resolution.get('max_retries', args.max_retries),
+            requests_per_second=resolution.get('requests_per_second', args.rate_limit),
+            base_url=args.resolve_base_url,
+            retry_failed_after_hours=resolution.get('retry_failed_after_hours', args.retry_failed_after),
+            max_failed_attempts=resolution.get('max_failed_attempts', args.max_failed_attempts),
+            quiet=args.quiet,
+            metrics=metrics
+        )
+
+
+if __name__ == "__main__":
+    cli_main()
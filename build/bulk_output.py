@@ -0,0 +1,153 @@
+"""
+Social Media Archive - Bulk Data File Output
+
+Writes tweets as a few consolidated data files instead of one markdown file per
+tweet, used by sql_extraction.py --output-format json/ndjson. Each record holds
+the frontmatter fields and the processed text as "body". JSON files are an
+array of records, NDJSON files have one record per line. The site reads both
+with src/loaders/tweetData.ts, which turns "body" into the entry body.
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+BULK_FORMATS = ('json', 'ndjson')
+# Tweets are grouped into one file per month of createdAt, or per N tweets
+BULK_GROUPS = ('month', 'count')
+DEFAULT_TWEETS_PER_FILE = 1000
+
+
+def get_bulk_filename(data, index, output_format, group_by='month', tweets_per_file=DEFAULT_TWEETS_PER_FILE):
+    """Return the name of the data file a tweet belongs to.
+
+    Args:
+        data (dict): Tweet row
+        index (int): Position of the tweet in the export, starting at 1
+        output_format (str): 'json' or 'ndjson'
+        group_by (str): 'month' or 'count'
+        tweets_per_file (int): Number of tweets per file when grouping by count
+
+    Returns:
+        str: e.g. "2012-01.json" or "tweets-00001.json"
+    """
+    if group_by == 'month':
+        created_at = data.get('createdAt') or ''
+        name = created_at[:7] if len(created_at) >= 7 else 'undated'
+    else:
+        name = f"tweets-{(index - 1) // tweets_per_file + 1:05d}"
+    return f"{name}.{output_format}"
+
+
+class BulkWriter:
+    def __init__(self, output_dir, output_format='json', manifest=None, metrics=None):
+        """Initialize the writer.
+
+        Records are buffered until the file name changes, so the records of a
+        file have to arrive one after another.
+
+        Args:
+            output_dir (str): Directory to save the data files
+            output_format (str): 'json' or 'ndjson'
+            manifest (dict): Content hashes of the previous run, unchanged files are not rewritten
+            metrics (Metrics): Optional metrics recording serialize and write times
+        """
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.manifest = manifest
+        self.metrics = metrics
+        self.filename = None
+        self.records = []
+        # Content hashes of the files written or found unchanged, for the manifest
+        self.rendered = {}
+        self.counts = {'exported': 0, 'updated': 0, 'unchanged': 0, 'error': 0}
+        self.tweets = 0
+
+    def add(self, filename, record):
+        """Add a record to the file it belongs to, writing the previous file when done."""
+        if filename != self.filename:
+            self.flush()
+            self.filename = filename
+        self.records.append(record)
+
+    def serialize(self):
+        """Return the buffered records as the content of a data file."""
+        lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) for record in self.records]
+        if self.output_format == 'ndjson':
+            return "\n".join(lines) + "\n"
+        return "[\n" + ",\n".join(lines) + "\n]\n"
+
+    def flush(self):
+        """Write the buffered records to their file.
+
+        The file is written to a temporary name and then renamed, so a reader
+        never sees a partially written file.
+        """
+        if not self.records:
+            return
+
+        started = time.perf_counter()
+        content = self.serialize().encode('utf-8')
+        filename = self.filename
+        self.tweets += len(self.records)
+        self.records = []
+
+        result = 'exported'
+        if self.manifest is not None:
+            content_hash = hashlib.sha256(content).hexdigest()
+            self.rendered[filename] = content_hash
+            previous_hash = self.manifest.get(filename)
+            if previous_hash == content_hash:
+                self.counts['unchanged'] += 1
+                self.add_phase('serialize', started)
+                return
+            if previous_hash is not None:
+                result = 'updated'
+
+        serialized = self.add_phase('serialize', started)
+
+        filepath = os.path.join(self.output_dir, filename)
+        tmp_path = f"{filepath}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, filepath)
+        except OSError as e:
+            print(f"Error writing file {filepath}: {e}")
+            self.rendered.pop(filename, None)
+            result = 'error'
+        finally:
+            self.add_phase('write', serialized)
+        self.counts[result] += 1
+
+    def close(self):
+        """Write the last file.
+
+        Returns:
+            dict: Number of files per write result
+        """
+        self.flush()
+        return self.counts
+
+    def add_phase(self, name, started):
+        """Add the time since started to a phase of the metrics and return the current time."""
+        now = time.perf_counter()
+        if self.metrics:
+            self.metrics.add_phase(name, now - started)
+        return now
@@ -0,0 +1,287 @@
+"""
+Social Media Archive - Build Metrics
+
+Shared by url_extraction.py, sql_extraction.py and build_archive.py to record
+where a run spends its time: timings per phase, counters, HTTP latency per host
+and throughput over time. The metrics can be written as JSON (--metrics-json),
+and runs can optionally be profiled with cProfile (--profile) and tracemalloc
+(--trace-memory).
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_VERSION = 1
+
+# Upper bounds of the HTTP latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Throughput is sampled (and progress printed) at most this often
+SAMPLE_INTERVAL_SECONDS = 5
+
+# Number of functions and allocation sites kept from the profilers
+PROFILE_TOP_FUNCTIONS = 25
+MEMORY_TOP_ALLOCATIONS = 10
+
+
+class Metrics:
+    def __init__(self, script=None):
+        """Initialize empty metrics for one run.
+
+        Phases and counters are meant to be recorded from a single thread,
+        latencies may be observed from any thread.
+
+        Args:
+            script (str): Name of the script, included in the JSON output
+        """
+        self.script = script
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        # Phase name -> [seconds, calls]
+        self.phases = {}
+        self.counters = {}
+        # Host -> [count per bucket, total seconds, max seconds]
+        self.latency = {}
+        self.latency_lock = threading.Lock()
+        # Counter name -> list of (elapsed seconds, value) samples
+        self.throughput = {}
+        self.last_sample = {}
+        self.profiler = None
+        self.profile_path = None
+        self.profile = None
+        self.memory = None
+
+    def elapsed(self):
+        """Seconds since the metrics were created."""
+        return time.perf_counter() - self.start
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of code and add it to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds, calls=1):
+        """Add time measured elsewhere (e.g. in a worker process) to a phase."""
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, calls]
+        else:
+            phase[0] += seconds
+            phase[1] += calls
+
+    def take_phases(self):
+        """Return the phase timings recorded so far and start over.
+
+        Used by worker processes to report the timings of each chunk.
+        """
+        phases, self.phases = self.phases, {}
+        return phases
+
+    def merge_phases(self, phases):
+        """Add phase timings returned by take_phases() of another process."""
+        for name, (seconds, calls) in phases.items():
+            self.add_phase(name, seconds, calls)
+
+    def count(self, name, value=1):
+        """Increase a counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def update_counters(self, values):
+        """Set counters from a dict, e.g. the stats of the exporter."""
+        self.counters.update(values)
+
+    def observe_latency(self, host, seconds):
+        """Record the duration of an HTTP request to a host. Thread-safe."""
+        bucket = len(LATENCY_BUCKETS_MS)
+        milliseconds = seconds * 1000
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if milliseconds <= bound:
+                bucket = i
+                break
+
+        with self.latency_lock:
+            histogram = self.latency.get(host)
+            if histogram is None:
+                histogram = self.latency[host] = [[0] * (len(LATENCY_BUCKETS_MS) + 1), 0.0, 0.0]
+            histogram[0][bucket] += 1
+            histogram[1] += seconds
+            histogram[2] = max(histogram[2], seconds)
+
+    def sample_throughput(self, name, value, force=False):
+        """Record the progress of a counter, at most every SAMPLE_INTERVAL_SECONDS.
+
+        Args:
+            name (str): What is counted, e.g. "tweets" or "urls"
+            value (int): Total processed so far
+            force (bool): Record a sample regardless of the interval (e.g. at the end)
+
+        Returns:
+            bool: True if a sample was recorded, callers print progress then
+        """
+        elapsed = self.elapsed()
+        if not force and elapsed - self.last_sample.get(name, 0) < SAMPLE_INTERVAL_SECONDS:
+            return False
+        self.last_sample[name] = elapsed
+        self.throughput.setdefault(name, []).append((round(elapsed, 3), value))
+        return True
+
+    def rate(self, name):
+        """Return the average rate per second of a counter over its latest sample interval."""
+        samples = self.throughput.get(name)
+        if not samples:
+            return 0.0
+        previous = samples[-2] if len(samples) > 1 else (0.0, 0)
+        seconds = samples[-1][0] - previous[0]
+        return (samples[-1][1] - previous[1]) / seconds if seconds > 0 else 0.0
+
+    def format_phases(self):
+        """Return the phase timings as a single line for the summary."""
+        return ", ".join(f"{name} {seconds:.2f}s" for name, (seconds, _) in self.phases.items())
+
+    def start_profiling(self, profile_path=None, trace_memory=False):
+        """Start cProfile and/or tracemalloc for the rest of the run.
+
+        cProfile only sees the thread that called this, not worker threads or processes.
+
+        Args:
+            profile_path (str): Write the cProfile statistics (pstats format) to this file
+            trace_memory (bool): Track Python memory allocations with tracemalloc
+        """
+        if trace_memory:
+            tracemalloc.start()
+        if profile_path:
+            self.profile_path = profile_path
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profiling(self):
+        """Stop the profilers and keep a summary of their results."""
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            stats = pstats.Stats(self.profiler).stats
+            top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+            self.profile = {
+                'path': self.profile_path,
+                'top_cumulative': [
+                    {
+                        'function': f"{os.path.basename(filename)}:{line}({function})",
+                        'calls': calls,
+                        'total_seconds': round(total, 4),
+                        'cumulative_seconds': round(cumulative, 4),
+                    }
+                    for (filename, line, function), (_, calls, total, cumulative, _) in top
+                ],
+            }
+            self.profiler = None
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            self.memory = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top_allocations': [
+                    {'location': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                    for stat in snapshot.statistics('lineno')[:MEMORY_TOP_ALLOCATIONS]
+                ],
+            }
+            tracemalloc.stop()
+
+    def to_dict(self):
+        """Return all metrics as a JSON-serializable dict."""
+        return {
+            'version': METRICS_VERSION,
+            'script': self.script,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_seconds': round(self.elapsed(), 3),
+            'phases': {
+                name: {'seconds': round(seconds, 4), 'calls': calls}
+                for name, (seconds, calls) in self.phases.items()
+            },
+            'counters': dict(self.counters),
+            'http_latency': {
+                host: {
+                    'buckets_ms': list(LATENCY_BUCKETS_MS) + [None],
+                    'counts': counts,
+                    'requests': sum(counts),
+                    'mean_ms': round(total / sum(counts) * 1000, 2),
+                    'max_ms': round(maximum * 1000, 2),
+                }
+                for host, (counts, total, maximum) in self.latency.items()
+            },
+            'throughput': {
+                name: [{'seconds': seconds, 'total': value} for seconds, value in samples]
+                for name, samples in self.throughput.items()
+            },
+            'profile': self.profile,
+            'memory': self.memory,
+        }
+
+    def write_json(self, path):
+        """Atomically write the metrics as JSON.
+
+        Args:
+            path (str): Path of the JSON file
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+
+def add_metrics_arguments(parser):
+    """Add the output and metrics options shared by all build scripts to a parser."""
+    parser.add_argument("--quiet", action="store_true", help="Only print the start and summary, no progress")
+    parser.add_argument("--metrics-json", type=str, help="Write timings per phase, counters and HTTP latencies to this JSON file")
+    parser.add_argument("--profile", type=str, help="Profile the run with cProfile and write the statistics to this file")
+    parser.add_argument("--trace-memory", action="store_true", help="Track memory allocations with tracemalloc (slow)")
+
+
+@contextmanager
+def collect_metrics(metrics, args):
+    """Run a block with the profilers requested on the command line, then write the metrics.
+
+    Args:
+        metrics (Metrics): Metrics of the run
+        args (argparse.Namespace): Parsed arguments, see add_metrics_arguments()
+    """
+    metrics.start_profiling(args.profile, args.trace_memory)
+    try:
+        yield metrics
+    finally:
+        metrics.stop_profiling()
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+            print(f"Metrics written to {args.metrics_json}")
+        if args.profile:
+            print(f"Profile written to {args.profile} (view with: python -m pstats {args.profile})")
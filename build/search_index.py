@@ -0,0 +1,294 @@
+"""
+Social Media Archive - Prebuilt Search Index
+
+This module builds a sharded inverted index of the exported tweets at build time,
+so the search page no longer has to download every tweet and index it in the browser.
+
+The index is written to a directory that is served as static files:
+
+  meta.json            Index settings and the list of term shards
+  terms/tNNNN.json     Dictionary of all terms starting with the same prefix:
+                       number of tweets per term and where its first block is
+  postings/pNNNNN.json Posting blocks of consecutive terms, a few KiB per file
+  docs/dNNNNN.json     The tweets shown in search results, in fixed-size chunks
+
+The postings of a term are ordered by term frequency, highest first, and split
+into blocks of BLOCK_SIZE. The client tokenizes a query the same way, fetches
+the dictionary shards of the query prefixes, and then only as many posting
+blocks as it needs for the requested page of results. The first page therefore
+takes a bounded number of requests of bounded size, however many tweets
+contain a word.
+
+Postings are not kept in memory while the tweets are added. They are written to
+a temporary SQLite database, which sorts them on disk, and write() streams
+them back block by block.
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+
+# Must stay in sync with src/utils/searchIndex.ts
+INDEX_VERSION = 2
+DEFAULT_PREFIX_LENGTH = 2
+DEFAULT_DOCS_PER_SHARD = 50
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+
+# Postings per block, and the most postings per file of packed blocks
+BLOCK_SIZE = 500
+POSTINGS_PER_FILE = 2000
+
+# Postings buffered in memory before they are written to the temporary database
+SPILL_POSTINGS = 20000
+
+# Letters, digits and underscore; the client uses /[\p{L}\p{N}_]+/gu
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into lowercase search terms.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Terms between MIN_TERM_LENGTH and MAX_TERM_LENGTH characters
+    """
+    if not text:
+        return []
+    return [term for term in TOKEN_PATTERN.findall(text.lower())
+            if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH]
+
+
+def encode_block(postings):
+    """Encode a block of (doc id, term frequency) postings as a flat list.
+
+    Args:
+        postings (list): Postings ordered by term frequency, then doc id
+
+    Returns:
+        list: [doc id delta, term frequency, ...], the first delta is the doc id
+              itself and a delta is negative where the term frequency drops
+    """
+    encoded = []
+    previous = 0
+    for doc_id, frequency in postings:
+        encoded.append(doc_id - previous)
+        encoded.append(frequency)
+        previous = doc_id
+    return encoded
+
+
+class SearchIndexBuilder:
+    def __init__(self, output_dir, prefix_length=DEFAULT_PREFIX_LENGTH, docs_per_shard=DEFAULT_DOCS_PER_SHARD,
+                 block_size=BLOCK_SIZE, postings_per_file=POSTINGS_PER_FILE):
+        """Initialize the builder.
+
+        Args:
+            output_dir (str): Directory the index is written to (e.g. public/search-index)
+            prefix_length (int): Number of leading characters that select a term shard
+            docs_per_shard (int): Number of tweets per document chunk
+            block_size (int): Number of postings per block
+            postings_per_file (int): Blocks are packed into files of at most this many postings
+        """
+        self.output_dir = output_dir
+        self.prefix_length = prefix_length
+        self.docs_per_shard = docs_per_shard
+        self.block_size = block_size
+        self.postings_per_file = max(postings_per_file, block_size)
+        # Postings not yet written to the temporary database
+        self.pending = []
+        self.spill_dir = tempfile.TemporaryDirectory(prefix='search-index-')
+        self.spill_db = sqlite3.connect(os.path.join(self.spill_dir.name, 'postings.sqlite3'))
+        self.spill_db.execute("PRAGMA journal_mode = OFF")
+        self.spill_db.execute("PRAGMA synchronous = OFF")
+        self.spill_db.execute("CREATE TABLE postings (term TEXT NOT NULL, doc INTEGER NOT NULL, tf INTEGER NOT NULL)")
+        self.doc_count = 0
+        self.doc_buffer = []
+        self.doc_shards = 0
+        self.posting_files = 0
+        self.bytes_written = 0
+        # Time spent in add() and write(), without the rest of the export
+        self.build_seconds = 0.0
+
+        # Start from a clean directory so no shards of an older index are left behind
+        for name in ('terms', 'postings', 'docs', 'meta.json'):
+            path = os.path.join(output_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        for name in ('terms', 'postings', 'docs'):
+            os.makedirs(os.path.join(output_dir, name), exist_ok=True)
+
+    def add(self, slug, content, username, date):
+        """Add a tweet to the index.
+
+        Args:
+            slug (str): Slug of the tweet page (/tweets/<slug>/)
+            content (str): Tweet text as rendered in the markdown file
+            username (str): Author of the tweet
+            date (str): Creation date of the tweet
+        """
+        started = time.perf_counter()
+        doc_id = self.doc_count
+        self.doc_count += 1
+
+        self.pending.extend((term, doc_id, frequency) for term, frequency in
+                            Counter(tokenize(content) + tokenize(username)).items())
+        if len(self.pending) >= SPILL_POSTINGS:
+            self.spill_postings()
+
+        self.doc_buffer.append({'slug': slug, 'content': content, 'username': username, 'date': date})
+        if len(self.doc_buffer) >= self.docs_per_shard:
+            self.flush_docs()
+        self.build_seconds += time.perf_counter() - started
+
+    def spill_postings(self):
+        """Write the buffered postings to the temporary database."""
+        with self.spill_db:
+            self.spill_db.executemany("INSERT INTO postings VALUES (?, ?, ?)", self.pending)
+        self.pending = []
+
+    def iter_blocks(self):
+        """Stream the postings back from the temporary database, sorted on disk.
+
+        Yields:
+            tuple: (term, block) in term order, where a block holds up to block_size
+                   (doc id, term frequency) postings of the term, ordered by term
+                   frequency (highest first), then doc id
+        """
+        cursor = self.spill_db.execute("SELECT term, doc, tf FROM postings ORDER BY term, tf DESC, doc")
+        term = None
+        block = []
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for row_term, doc_id, frequency in rows:
+                if row_term != term or len(block) == self.block_size:
+                    if block:
+                        yield term, block
+                    term = row_term
+                    block = []
+                block.append((doc_id, frequency))
+        if block:
+            yield term, block
+
+    def flush_docs(self):
+        """Write the buffered tweets as the next document chunk."""
+        if not self.doc_buffer:
+            return
+        self.write_json(os.path.join('docs', f"d{self.doc_shards:05d}.json"), self.doc_buffer)
+        self.doc_shards += 1
+        self.doc_buffer = []
+
+    def write_json(self, relative_path, data):
+        """Write compact JSON to a file in the index directory."""
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        with open(os.path.join(self.output_dir, relative_path), 'w', encoding='utf-8') as f:
+            f.write(payload)
+        self.bytes_written += len(payload.encode('utf-8'))
+
+    def write(self):
+        """Write the term shards, posting files and meta.json.
+
+        Terms arrive sorted, so the terms of a prefix come one after another.
+        Only the dictionary of the current prefix and the blocks of the current
+        posting file are in memory at a time.
+
+        Returns:
+            dict: Build statistics (documents, terms, shards, files, bytes, seconds)
+        """
+        started = time.perf_counter()
+        self.flush_docs()
+        self.spill_postings()
+
+        shard_files = {}
+        dictionary = {}
+        prefix = None
+        blocks = []
+        block_postings = 0
+        terms = 0
+
+        def write_posting_file():
+            nonlocal blocks, block_postings
+            if blocks:
+                self.write_json(os.path.join('postings', f"p{self.posting_files:05d}.json"), blocks)
+                self.posting_files += 1
+                blocks = []
+                block_postings = 0
+
+        def write_dictionary():
+            if dictionary:
+                filename = f"t{len(shard_files):04d}.json"
+                self.write_json(os.path.join('terms', filename), dictionary)
+                shard_files[prefix] = filename
+
+        for term, block in self.iter_blocks():
+            if term[:self.prefix_length] != prefix:
+                write_dictionary()
+                dictionary = {}
+                prefix = term[:self.prefix_length]
+
+            if block_postings + len(block) > self.postings_per_file:
+                write_posting_file()
+            entry = dictionary.get(term)
+            if entry is None:
+                # Dictionary entry: [document count, highest term frequency, file, position]
+                # of the first block. The blocks of a term are stored one after another,
+                # the next one is in the following file once a file ends.
+                entry = dictionary[term] = [0, block[0][1], self.posting_files, len(blocks)]
+                terms += 1
+            entry[0] += len(block)
+            blocks.append(encode_block(block))
+            block_postings += len(block)
+        write_posting_file()
+        write_dictionary()
+
+        self.spill_db.close()
+        self.spill_dir.cleanup()
+
+        # meta.json is written last, so a client never sees a half-written index
+        self.write_json('meta.json', {
+            'version': INDEX_VERSION,
+            'docCount': self.doc_count,
+            'docsPerShard': self.docs_per_shard,
+            'prefixLength': self.prefix_length,
+            'blockSize': self.block_size,
+            'minTermLength': MIN_TERM_LENGTH,
+            'maxTermLength': MAX_TERM_LENGTH,
+            'termShards': shard_files,
+        })
+
+        self.build_seconds += time.perf_counter() - started
+        return {
+            'documents': self.doc_count,
+            'terms': terms,
+            'term_shards': len(shard_files),
+            'posting_files': self.posting_files,
+            'doc_shards': self.doc_shards,
+            'bytes': self.bytes_written,
+            'seconds': self.build_seconds,
+        }
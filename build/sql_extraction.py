@@ -34,7 +34,142 @@ import argparse
 import re
 import time
 import json
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from bulk_output import BULK_FORMATS, BULK_GROUPS, DEFAULT_TWEETS_PER_FILE, BulkWriter, get_bulk_filename
+from metrics import Metrics, add_metrics_arguments, collect_metrics
+from search_index import SearchIndexBuilder
+from tco_links import find_tco_urls, rewrite_tco_links
+
+# Columns that end up in the frontmatter, mirroring the `tweets` collection
+# schema in src/content.config.ts. Other columns are never read.
+FRONTMATTER_FIELDS = (
+    'id', 'username', 'tweetID', 'conversationID', 'createdAt',
+    'likeCount', 'quoteCount', 'replyCount', 'retweetCount',
+    'isLiked', 'isRetweeted', 'path', 'addedToDatabaseAt',
+    'archivedAt', 'deletedAt', 'isBookmarked', 'deletedTweetAt',
+    'deletedRetweetAt', 'deletedLikeAt', 'deletedBookmarkAt'
+)
+
+# Number of rows fetched from the database at a time
+DEFAULT_CHUNK_SIZE = 1000
+
+# Manifest of rendered files kept in the output directory for incremental exports
+MANIFEST_FILENAME = '.export-manifest.json'
+MANIFEST_VERSION = 1
+
+# Columns whose maximum is recorded after each run, so the next run can select
+# only tweets added or deleted since then
+WATERMARK_COLUMNS = (
+    'addedToDatabaseAt', 'deletedAt', 'deletedTweetAt',
+    'deletedRetweetAt', 'deletedLikeAt', 'deletedBookmarkAt'
+)
+
+# Result of writing a single tweet
+EXPORT_RESULTS = ('exported', 'updated', 'unchanged', 'skipped', 'error')
+
+# One markdown file per tweet, or consolidated data files (see bulk_output.py)
+OUTPUT_FORMATS = ('markdown',) + BULK_FORMATS
+
+# Markdown files go into the output directory itself, or into 256 subdirectories
+# named after the first two hex digits of a hash of the filename
+MARKDOWN_LAYOUTS = ('flat', 'hashed')
+HASHED_DIR_LENGTH = 2
+
+# PyYAML folds plain and quoted scalars at spaces past this column
+YAML_LINE_WIDTH = 80
+YAML_STR_TAG = 'tag:yaml.org,2002:str'
+yaml_resolver = yaml.resolver.Resolver()
+
+# PyYAML writes a key as "? key" unless the key plus its prepared tag ("!!str")
+# is shorter than 128 characters (Emitter.check_simple_key)
+MAX_SIMPLE_KEY_LENGTH = 128 - len('!!str')
+
+# Strings made of these characters never need escaping. Words are separated by
+# single spaces, which only matter when a line is long enough to be folded.
+SIMPLE_SCALAR_PATTERN = re.compile(r'[A-Za-z0-9/][A-Za-z0-9_./:+-]*(?: [A-Za-z0-9_./:+-]+)*\Z')
+
+def emit_simple_field(key, value):
+    """Emit a single "key: value" frontmatter line without PyYAML's emitter.
+    
+    Args:
+        key (str): Frontmatter key
+        value: Field value
+        
+    Returns:
+        str: The YAML line exactly as yaml.dump() would write it, or None if
+             the value is not a simple scalar and PyYAML has to handle it
+    """
+    if value is None:
+        return f"{key}: null\n"
+    if value is True or value is False:
+        return f"{key}: {'true' if value else 'false'}\n"
+    if type(value) is int:
+        return f"{key}: {value}\n"
+    if type(value) is not str or not SIMPLE_SCALAR_PATTERN.match(value):
+        return None
+    if value.endswith(':') or ': ' in value:
+        return None
+    
+    # Strings that would be read back as another type (numbers, dates, booleans) are quoted
+    if yaml_resolver.resolve(yaml.ScalarNode, value, (True, False)) == YAML_STR_TAG:
+        line = f"{key}: {value}\n"
+    else:
+        line = f"{key}: '{value}'\n"
+    
+    if ' ' in value and len(line) - 1 > YAML_LINE_WIDTH:
+        return None
+    return line
+
+@lru_cache(maxsize=1024)
+def is_simple_key(key):
+    """Check if a frontmatter key can be written as it is, without quotes.
+    
+    Keys that would be read back as another type (e.g. '1', 'null', 'on') are
+    quoted by yaml.dump(), and keys of MAX_SIMPLE_KEY_LENGTH characters or more
+    are written in the "? key" form. Keys repeat for every tweet, so the
+    result is cached.
+    
+    Args:
+        key (str): Frontmatter key
+        
+    Returns:
+        bool: True if the key is written as plain text
+    """
+    return (len(key) < MAX_SIMPLE_KEY_LENGTH and ' ' not in key and ':' not in key
+            and SIMPLE_SCALAR_PATTERN.match(key) is not None
+            and yaml_resolver.resolve(yaml.ScalarNode, key, (True, False)) == YAML_STR_TAG)
+
+def dump_frontmatter(data):
+    """Serialize a flat tweet record to YAML frontmatter.
+    
+    The output is byte-identical to yaml.dump(data, sort_keys=False, allow_unicode=True).
+    The fixed scalar fields of the tweets schema are written directly, and only
+    values that need escaping, folding or special number formatting are passed
+    to yaml.dump() one field at a time. libyaml's CDumper is not used because it
+    folds and escapes long strings differently from the pure-Python emitter.
+    
+    Args:
+        data (dict): Flat mapping of frontmatter fields
+        
+    Returns:
+        str: YAML document without the --- markers
+    """
+    if not data:
+        return yaml.dump(data, sort_keys=False, allow_unicode=True)
+    
+    lines = []
+    for key, value in data.items():
+        line = None
+        if type(key) is str and is_simple_key(key):
+            line = emit_simple_field(key, value)
+        if line is None:
+            line = yaml.dump({key: value}, sort_keys=False, allow_unicode=True)
+        lines.append(line)
+    return "".join(lines)
 
 class TwitterToMarkdownExporter:
     def __init__(self, db_path):
@@ -45,6 +180,25 @@ class TwitterToMarkdownExporter:
         """
         self.db_path = db_path
         self.url_map = {}
+        # Content hashes by filename, only set for incremental exports
+        self.manifest = None
+        self.rendered = {}
+        # Filenames of all tweets selected for an incremental export, also those
+        # whose write failed, so their existing files are not taken for orphans
+        self.selected = set()
+        # Tweets rendered for the search index, only collected when an index is built
+        self.search_index = None
+        # Optional callable(rows, conn) run on every chunk of rows before it is
+        # exported, e.g. to resolve new t.co links into url_map
+        self.chunk_hook = None
+        self.collect_search_docs = False
+        self.search_docs = []
+        # Timings per phase and throughput, see metrics.py
+        self.metrics = Metrics('sql_extraction')
+        # Only print the start and the summary, no progress
+        self.quiet = False
+        # Markdown layout, see MARKDOWN_LAYOUTS
+        self.layout = 'flat'
         self.stats = {
             'total_tweets': 0,
             'tweets_with_urls': 0,
@@ -115,46 +269,402 @@ class TwitterToMarkdownExporter:
         Returns:
             str: Text with t.co links replaced with markdown formatted resolved URLs
         """
-        if not text:
-            return text
-            
-        # Pattern to match t.co URLs
-        tco_pattern = r'https://t\.co/\S+'
+        processed_text, replaced, failed = rewrite_tco_links(text, self.url_map)
         
-        urls_found = re.findall(tco_pattern, text)
-        if urls_found:
+        if replaced or failed:
             self.stats['tweets_with_urls'] += 1
+            self.stats['urls_replaced'] += replaced
+            self.stats['urls_failed'] += failed
         
-        def replacer(match):
-            short_url = match.group()
-            resolved_url = self.url_map.get(short_url)
-            
-            if resolved_url:
-                self.stats['urls_replaced'] += 1
-                # Create markdown link format: [display_text](url)
-                # Use domain name as display text for cleaner appearance
-                try:
-                    from urllib.parse import urlparse
-                    domain = urlparse(resolved_url).netloc
-                    display_text = domain if domain else resolved_url
-                except:
-                    display_text = resolved_url
-                
-                return f"[{display_text}]({resolved_url})"
+        return processed_text
+    
+    def get_export_columns(self, cursor, tweet_table):
+        """Return the columns of the tweet table that the export needs.
+        
+        Columns keep their table order, so the frontmatter key order does not change.
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the tweet database
+            tweet_table (str): Name of the table containing tweet data
+            
+        Returns:
+            list: Column names to select (frontmatter fields and "text")
+        """
+        cursor.execute(f"PRAGMA table_info({tweet_table})")
+        wanted = set(FRONTMATTER_FIELDS) | {'text'}
+        return [row[1] for row in cursor.fetchall() if row[1] in wanted]
+    
+    def iter_tweets(self, cursor, tweet_table, columns, chunk_size=DEFAULT_CHUNK_SIZE, where=None, params=(),
+                    order_by=None):
+        """Stream tweets from the database without loading the whole table.
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the tweet database
+            tweet_table (str): Name of the table containing tweet data
+            columns (list): Column names to select
+            chunk_size (int): Number of rows fetched at a time
+            where (str): Optional WHERE clause to filter tweets
+            params (list): Parameters of the WHERE clause
+            order_by (str): Optional ORDER BY clause
+            
+        Yields:
+            dict: One tweet per row, keyed by column name
+        """
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        where_clause = f" WHERE {where}" if where else ""
+        order_clause = f" ORDER BY {order_by}" if order_by else ""
+        cursor.execute(f"SELECT {column_list} FROM {tweet_table}{where_clause}{order_clause};", params)
+        
+        while True:
+            with self.metrics.phase('query'):
+                rows = cursor.fetchmany(chunk_size)
+                rows = [dict(zip(columns, row)) for row in rows]
+            if not rows:
+                break
+            if self.chunk_hook:
+                self.chunk_hook(rows, cursor.connection)
+            yield from rows
+    
+    def load_manifest(self, manifest_path):
+        """Load the manifest of a previous incremental export.
+        
+        Args:
+            manifest_path (str): Path to the manifest file
+            
+        Returns:
+            dict: Manifest with "files" (filename to content hash) and "watermarks"
+        """
+        empty = {'version': MANIFEST_VERSION, 'files': {}, 'watermarks': {}}
+        if not os.path.exists(manifest_path):
+            return empty
+        
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not read manifest {manifest_path}, doing a full export: {e}")
+            return empty
+        
+        if manifest.get('version') != MANIFEST_VERSION:
+            print("Warning: Manifest version changed, doing a full export")
+            return empty
+        return manifest
+    
+    def list_output_files(self, output_dir, hashed=False):
+        """List the files in the output directory once, instead of checking every file.
+        
+        Args:
+            output_dir (str): Directory of the exported files
+            hashed (bool): Also list the files in the subdirectories of the hashed layout
+            
+        Returns:
+            set: Filenames relative to output_dir, as used in the manifest
+        """
+        files = set()
+        subdirectories = []
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files.add(entry.name)
+                elif hashed and entry.is_dir():
+                    subdirectories.append(entry.name)
+        
+        for subdirectory in subdirectories:
+            with os.scandir(os.path.join(output_dir, subdirectory)) as entries:
+                files.update(f"{subdirectory}/{entry.name}" for entry in entries if entry.is_file())
+        return files
+    
+    def save_manifest(self, manifest_path, manifest):
+        """Atomically write the manifest of this export.
+        
+        Args:
+            manifest_path (str): Path to the manifest file
+            manifest (dict): Manifest to save
+        """
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, sort_keys=True, separators=(',', ':'))
+        os.replace(tmp_path, manifest_path)
+    
+    def get_watermarks(self, cursor, tweet_table, columns):
+        """Return the latest addition and deletion timestamps in the tweet table.
+        
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the tweet database
+            tweet_table (str): Name of the table containing tweet data
+            columns (list): Columns of the tweet table that are exported
+            
+        Returns:
+            dict: Maximum value per watermark column
+        """
+        watermark_columns = [column for column in WATERMARK_COLUMNS if column in columns]
+        if not watermark_columns:
+            return {}
+        
+        selects = ", ".join(f'MAX("{column}")' for column in watermark_columns)
+        cursor.execute(f"SELECT {selects} FROM {tweet_table};")
+        return dict(zip(watermark_columns, cursor.fetchone()))
+    
+    def build_since_filter(self, watermarks):
+        """Build a WHERE clause selecting tweets added or deleted after the watermarks.
+        
+        Args:
+            watermarks (dict): Watermarks recorded by the previous run
+            
+        Returns:
+            tuple: (WHERE clause, query parameters)
+        """
+        conditions = []
+        params = []
+        for column, value in watermarks.items():
+            if value is None:
+                conditions.append(f'"{column}" IS NOT NULL')
             else:
-                # Keep original t.co link if no resolution found
-                self.stats['urls_failed'] += 1
-                return short_url
+                conditions.append(f'"{column}" > ?')
+                params.append(value)
+        return " OR ".join(conditions), params
+    
+    def get_tweet_slug(self, data, index):
+        """Return the identifier of a tweet used in filenames and search results, based on tweetID or id."""
+        return str(data.get('tweetID') or data.get('id', f'tweet_{index}'))
+    
+    def get_tweet_filename(self, data, index):
+        """Return the markdown filename of a tweet relative to the output directory."""
+        filename = f"{self.get_tweet_slug(data, index)}.md"
+        if self.layout == 'hashed':
+            subdirectory = hashlib.sha256(filename.encode('utf-8')).hexdigest()[:HASHED_DIR_LENGTH]
+            return f"{subdirectory}/{filename}"
+        return filename
+    
+    def add_search_doc(self, slug, text, data):
+        """Keep a rendered tweet for the search index, if one is built."""
+        if self.collect_search_docs:
+            self.search_docs.append((slug, text, data.get('username'), data.get('createdAt')))
+    
+    def write_tweet(self, data, output_dir, index):
+        """Render a single tweet and write it as a markdown file.
+        
+        Without a manifest, existing files are skipped. With a manifest, the
+        rendered file is hashed and only written when the hash changed.
+        
+        Args:
+            data (dict): Tweet row, including the "text" column
+            output_dir (str): Directory to save markdown files
+            index (int): Position of the tweet in the export, used as fallback filename
+            
+        Returns:
+            str: 'exported', 'updated', 'unchanged', 'skipped' (file already exists) or 'error'
+        """
+        metrics = self.metrics
+        started = time.perf_counter()
         
-        return re.sub(tco_pattern, replacer, text)
+        # Extract and process tweet text
+        body_text = (data.pop("text", "") or "").strip()
+        processed_text = self.replace_tco_links(body_text)
+        
+        # Generate filename using tweetID or id
+        filename = self.get_tweet_filename(data, index)
+        filepath = os.path.join(output_dir, filename)
+        
+        self.add_search_doc(self.get_tweet_slug(data, index), processed_text, data)
+        
+        transformed = time.perf_counter()
+        metrics.add_phase('transform', transformed - started)
+        
+        # Skip if file already exists
+        if self.manifest is None and os.path.exists(filepath):
+            metrics.add_phase('write', time.perf_counter() - transformed)
+            return 'skipped'
+        
+        # Create YAML frontmatter from remaining data
+        try:
+            frontmatter = dump_frontmatter(data)
+        except Exception as e:
+            print(f"Warning: Error creating frontmatter for tweet {filename[:-3]}: {e}")
+            frontmatter = f"# Error creating frontmatter: {e}\n"
+        
+        content = f"---\n{frontmatter}---\n\n{processed_text}"
+        
+        result = 'exported'
+        if self.manifest is not None:
+            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            previous_hash = self.manifest.get(filename)
+            if previous_hash == content_hash:
+                self.rendered[filename] = content_hash
+                metrics.add_phase('serialize', time.perf_counter() - transformed)
+                return 'unchanged'
+            if previous_hash is not None:
+                result = 'updated'
+        
+        serialized = time.perf_counter()
+        metrics.add_phase('serialize', serialized - transformed)
+        
+        # Write markdown file
+        try:
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(content)
+        except Exception as e:
+            print(f"Error writing file {filepath}: {e}")
+            return 'error'
+        finally:
+            metrics.add_phase('write', time.perf_counter() - serialized)
+        
+        if self.manifest is not None:
+            self.rendered[filename] = content_hash
+        return result
+    
+    def render_record(self, data, index):
+        """Render a tweet as a record of the bulk output.
+        
+        Args:
+            data (dict): Tweet row, including the "text" column
+            index (int): Position of the tweet in the export
+            
+        Returns:
+            dict: The frontmatter fields and the processed text as "body"
+        """
+        started = time.perf_counter()
+        body_text = (data.pop("text", "") or "").strip()
+        data['body'] = self.replace_tco_links(body_text)
+        self.add_search_doc(self.get_tweet_slug(data, index), data['body'], data)
+        self.metrics.add_phase('transform', time.perf_counter() - started)
+        return data
+    
+    def export_bulk(self, tweets, output_dir, total, output_format, group_by='month',
+                    tweets_per_file=DEFAULT_TWEETS_PER_FILE):
+        """Write tweets as consolidated data files instead of one file per tweet.
+        
+        Only the records of the current file are kept in memory, so tweets have to
+        arrive grouped by file (ordered by createdAt when grouping by month).
+        
+        Args:
+            tweets (iterable): (index, tweet row) pairs
+            output_dir (str): Directory to save the data files
+            total (int): Total number of tweets, for the progress indicator
+            output_format (str): 'json' or 'ndjson'
+            group_by (str): 'month' or 'count', see bulk_output.get_bulk_filename()
+            tweets_per_file (int): Number of tweets per file when grouping by count
+            
+        Returns:
+            dict: Number of files per write result
+        """
+        writer = BulkWriter(output_dir, output_format, self.manifest, self.metrics)
+        for i, data in tweets:
+            record = self.render_record(data, i)
+            for doc in self.search_docs:
+                self.search_index.add(*doc)
+            self.search_docs.clear()
+            filename = get_bulk_filename(record, i, output_format, group_by, tweets_per_file)
+            if self.manifest is not None:
+                self.selected.add(filename)
+            writer.add(filename, record)
+            self.report_progress(i, total)
+        
+        counts = dict.fromkeys(EXPORT_RESULTS, 0)
+        counts.update(writer.close())
+        self.rendered.update(writer.rendered)
+        return counts
+    
+    def track_selected(self, tweets):
+        """Pass (index, tweet row) pairs through, recording the filename of every tweet in selected."""
+        for i, data in tweets:
+            self.selected.add(self.get_tweet_filename(data, i))
+            yield i, data
+    
+    def report_progress(self, processed, total):
+        """Record the throughput and print a progress line every few seconds."""
+        if self.metrics.sample_throughput('tweets', processed) and not self.quiet:
+            print(f"Processed {processed}/{total} tweets ({self.metrics.rate('tweets'):.1f}/s)...")
+    
+    def export_parallel(self, tweets, output_dir, total, workers, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Render and write tweets in a pool of worker processes.
+        
+        Tweets are sent to the workers in ordered chunks. Only a few chunks are
+        in flight at a time, so memory use stays flat.
+        
+        Args:
+            tweets (iterable): (index, tweet row) pairs
+            output_dir (str): Directory to save markdown files
+            total (int): Total number of tweets, for the progress indicator
+            workers (int): Number of worker processes
+            chunk_size (int): Number of tweets per chunk
+            
+        Returns:
+            dict: Number of tweets per write result, see write_tweet()
+        """
+        counts = dict.fromkeys(EXPORT_RESULTS, 0)
+        pending = deque()
+        
+        def submit(chunk):
+            # url_map can grow during the export (chunk_hook), so send the
+            # mappings a chunk needs along with it
+            url_updates = {}
+            if self.chunk_hook:
+                for _, data in chunk:
+                    for short_url in find_tco_urls(data.get('text')):
+                        if short_url in self.url_map:
+                            url_updates[short_url] = self.url_map[short_url]
+            pending.append(executor.submit(write_tweet_chunk, chunk, output_dir, url_updates))
+        
+        def collect():
+            # Time the main process waits for workers, the phases they report
+            # add up the time spent in all worker processes
+            with self.metrics.phase('wait_workers'):
+                chunk_counts, stats, rendered, search_docs, phases, last_index = pending.popleft().result()
+            for key in EXPORT_RESULTS:
+                counts[key] += chunk_counts[key]
+            for key in WORKER_STATS:
+                self.stats[key] += stats[key]
+            self.metrics.merge_phases(phases)
+            self.rendered.update(rendered)
+            for doc in search_docs:
+                self.search_index.add(*doc)
+            self.report_progress(last_index, total)
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker,
+                                 initargs=(self.url_map, self.manifest, self.collect_search_docs, self.layout)) as executor:
+            chunk = []
+            for item in tweets:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    submit(chunk)
+                    chunk = []
+                    if len(pending) >= workers * 2:
+                        collect()
+            if chunk:
+                submit(chunk)
+            while pending:
+                collect()
+        
+        return counts
     
-    def export_to_markdown(self, tweet_table, output_dir, url_table='resolved_urls'):
+    def export_to_markdown(self, tweet_table, output_dir, url_table='resolved_urls', chunk_size=DEFAULT_CHUNK_SIZE,
+                           workers=1, incremental=False, since_last_run=False, delete_orphans=False,
+                           manifest_path=None, search_index_dir=None, output_format='markdown',
+                           group_by='month', tweets_per_file=DEFAULT_TWEETS_PER_FILE, layout='flat'):
         """Export tweets from SQLite database to markdown files.
         
+        Tweets are streamed from the database in chunks, so memory use does not
+        grow with the size of the archive.
+        
+        With output_format 'json' or 'ndjson', tweets are written as a few data files
+        (one per month or per tweets_per_file tweets) instead of one markdown file each.
+        
         Args:
             tweet_table (str): Name of the table containing tweet data
             output_dir (str): Directory to save markdown files
             url_table (str): Name of the table containing resolved URLs
+            chunk_size (int): Number of rows fetched from the database at a time
+            workers (int): Number of processes rendering and writing files (1 = no pool)
+            incremental (bool): Use the manifest to rewrite only files whose content changed
+            since_last_run (bool): Only query tweets added or deleted since the last incremental run
+            delete_orphans (bool): Delete files of tweets that are no longer in the database
+            manifest_path (str): Manifest location (default: MANIFEST_FILENAME in output_dir)
+            search_index_dir (str): Also build the prebuilt search index into this directory
+            output_format (str): 'markdown', 'json' or 'ndjson', see OUTPUT_FORMATS
+            group_by (str): Data file per 'month' or per 'count' tweets (bulk formats only)
+            tweets_per_file (int): Number of tweets per data file when grouping by count
+            layout (str): 'flat' or 'hashed' subdirectories for markdown files
         """
         # Start timing
         start_time = time.time()
@@ -165,73 +675,145 @@ class TwitterToMarkdownExporter:
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
+        bulk = output_format in BULK_FORMATS
+        self.layout = layout
+        hashed = layout == 'hashed' and not bulk
+        if hashed:
+            for i in range(16 ** HASHED_DIR_LENGTH):
+                os.makedirs(os.path.join(output_dir, f"{i:0{HASHED_DIR_LENGTH}x}"), exist_ok=True)
         
         # Load URL mappings once
-        self.load_url_map(url_table)
+        with self.metrics.phase('url_map_load'):
+            self.load_url_map(url_table)
         
         # Connect to database
         try:
             conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            # Get all tweets
-            cursor.execute(f"SELECT * FROM {tweet_table};")
-            rows = cursor.fetchall()
+            columns = self.get_export_columns(cursor, tweet_table)
             
-            if not rows:
+            # Load the manifest of the previous incremental run once
+            old_files = {}
+            where, params = None, ()
+            if incremental or since_last_run:
+                manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_FILENAME)
+                manifest = self.load_manifest(manifest_path)
+                old_files = manifest['files']
+                self.manifest = old_files
+                self.rendered = {}
+                self.selected = set()
+                
+                # The manifest may not match the directory (files deleted by hand,
+                # a fresh checkout), so files it lists that are missing are written again
+                existing = self.list_output_files(output_dir, hashed)
+                missing = [filename for filename in old_files if filename not in existing]
+                for filename in missing:
+                    del old_files[filename]
+                del existing
+                if missing:
+                    print(f"{len(missing)} files of the manifest are missing in {output_dir}, writing them again")
+                
+                if since_last_run and missing:
+                    # Their tweets may not have changed since the last run
+                    print("Warning: --since-last-run is ignored because files are missing, checking all tweets")
+                elif since_last_run and bulk:
+                    # A data file holds many tweets, so all of them are needed to rewrite it
+                    print("Warning: --since-last-run is ignored for data files, checking all tweets")
+                elif since_last_run and manifest['watermarks']:
+                    where, params = self.build_since_filter(manifest['watermarks'])
+                    print("Only exporting tweets added or deleted since the last run")
+            
+            # Count tweets up front for the progress indicator
+            where_clause = f" WHERE {where}" if where else ""
+            cursor.execute(f"SELECT COUNT(*) FROM {tweet_table}{where_clause};", params)
+            total = cursor.fetchone()[0]
+            
+            if not total and not self.manifest:
                 print(f"No data found in table '{tweet_table}'")
                 conn.close()
                 return
             
-            self.stats['total_tweets'] = len(rows)
-            print(f"Processing {len(rows)} tweets...")
+            self.stats['total_tweets'] = total
+            print(f"Processing {total} tweets...")
+            
+            # The search index covers all tweets, so it needs a full scan
+            self.search_index = None
+            if search_index_dir and where:
+                print("Warning: The search index is not rebuilt with --since-last-run")
+            elif search_index_dir:
+                self.search_index = SearchIndexBuilder(search_index_dir)
+                self.collect_search_docs = True
+            
+            # Data files per month need the tweets of a month one after another
+            order_by = None
+            if bulk and group_by == 'month' and 'createdAt' in columns:
+                order_by = '"createdAt", rowid'
             
             # Process each tweet
-            exported_count = 0
-            skipped_count = 0
+            tweets = enumerate(self.iter_tweets(cursor, tweet_table, columns, chunk_size, where, params, order_by), 1)
+            if self.manifest is not None and not bulk:
+                tweets = self.track_selected(tweets)
             
-            for i, row in enumerate(rows, 1):
-                # Convert Row to dictionary
-                data = dict(row)
-                
-                # Extract and process tweet text
-                body_text = data.pop("text", "").strip()
-                processed_text = self.replace_tco_links(body_text)
-                
-                # Generate filename using tweetID or id
-                tweet_id = data.get('tweetID') or data.get('id', f'tweet_{i}')
-                filename = f"{tweet_id}.md"
-                filepath = os.path.join(output_dir, filename)
+            if bulk:
+                print(f"Writing {output_format} data files per {'month' if group_by == 'month' else f'{tweets_per_file} tweets'}...")
+                counts = self.export_bulk(tweets, output_dir, total, output_format, group_by, tweets_per_file)
+            elif workers > 1:
+                print(f"Rendering with {workers} worker processes...")
+                counts = self.export_parallel(tweets, output_dir, total, workers, chunk_size)
+            else:
+                counts = dict.fromkeys(EXPORT_RESULTS, 0)
+                for i, data in tweets:
+                    result = self.write_tweet(data, output_dir, i)
+                    counts[result] += 1
+                    for doc in self.search_docs:
+                        self.search_index.add(*doc)
+                    self.search_docs.clear()
+                    
+                    # Progress indicator
+                    self.report_progress(i, total)
+            self.metrics.sample_throughput('tweets', self.stats['total_tweets'], force=True)
+            
+            index_stats = self.search_index.write() if self.search_index else None
+            if index_stats:
+                self.metrics.add_phase('search_index', index_stats['seconds'])
+                self.metrics.update_counters({
+                    'search_index_bytes': index_stats['bytes'],
+                    'search_index_terms': index_stats['terms'],
+                    'search_index_term_shards': index_stats['term_shards'],
+                    'search_index_posting_files': index_stats['posting_files'],
+                })
+            
+            orphans = []
+            if self.manifest is not None:
+                # Tweets that were not selected this run, or whose file could not
+                # be written, keep their previous entry
+                files = dict(old_files)
+                files.update(self.rendered)
                 
-                # Skip if file already exists
-                if os.path.exists(filepath):
-                    skipped_count += 1
-                    continue
+                # Files whose tweets are no longer in the database
+                if where:
+                    key_columns = [column for column in columns if column in ('id', 'tweetID')]
+                    known = {self.get_tweet_filename(data, i) for i, data in
+                             enumerate(self.iter_tweets(cursor, tweet_table, key_columns, chunk_size), 1)}
+                else:
+                    known = self.selected
+                orphans = sorted(filename for filename in files if filename not in known)
                 
-                # Create YAML frontmatter from remaining data
-                try:
-                    frontmatter = yaml.dump(data, sort_keys=False, allow_unicode=True)
-                except Exception as e:
-                    print(f"Warning: Error creating frontmatter for tweet {tweet_id}: {e}")
-                    frontmatter = f"# Error creating frontmatter: {e}\n"
+                if orphans and delete_orphans:
+                    for filename in orphans:
+                        try:
+                            os.remove(os.path.join(output_dir, filename))
+                        except FileNotFoundError:
+                            pass
+                        del files[filename]
                 
-                # Write markdown file
-                try:
-                    with open(filepath, "w", encoding="utf-8") as f:
-                        f.write("---\n")
-                        f.write(frontmatter)
-                        f.write("---\n\n")
-                        f.write(processed_text)
-                    
-                    exported_count += 1
-                    
-                    # Progress indicator
-                    if i % 100 == 0:
-                        print(f"Processed {i}/{len(rows)} tweets...")
-                        
-                except Exception as e:
-                    print(f"Error writing file {filepath}: {e}")
+                with self.metrics.phase('manifest'):
+                    self.save_manifest(manifest_path, {
+                        'version': MANIFEST_VERSION,
+                        'files': files,
+                        'watermarks': self.get_watermarks(cursor, tweet_table, columns),
+                    })
             
             conn.close()
             
@@ -251,17 +833,38 @@ class TwitterToMarkdownExporter:
             else:
                 time_str = f"{seconds:.2f}s"
             
+            self.metrics.update_counters(self.stats)
+            self.metrics.update_counters(counts)
+            self.metrics.update_counters({'orphans': len(orphans)})
+            
             # Print summary
             print("-" * 60)
             print("Export Summary:")
             print(f"  Total tweets processed: {self.stats['total_tweets']}")
-            print(f"  New markdown files created: {exported_count}")
-            print(f"  Files skipped (already exist): {skipped_count}")
+            file_type = f"{output_format} data" if bulk else "markdown"
+            print(f"  New {file_type} files created: {counts['exported']}")
+            if self.manifest is not None:
+                print(f"  Files updated (content changed): {counts['updated']}")
+                print(f"  Files unchanged: {counts['unchanged']}")
+                orphan_action = "deleted" if delete_orphans else "kept, use --delete-orphans to remove"
+                orphan_label = "Data files no longer written" if bulk else "Files of tweets no longer in the database"
+                print(f"  {orphan_label}: {len(orphans)} ({orphan_action})")
+                for filename in orphans[:10]:
+                    print(f"    {filename}")
+            elif not bulk:
+                print(f"  Files skipped (already exist): {counts['skipped']}")
             print(f"  Tweets containing t.co URLs: {self.stats['tweets_with_urls']}")
             print(f"  URLs successfully replaced: {self.stats['urls_replaced']}")
             print(f"  URLs left as t.co (failed/not found): {self.stats['urls_failed']}")
             print(f"  Output directory: {output_dir}")
+            if index_stats:
+                print(f"  Search index: {index_stats['documents']} tweets, {index_stats['terms']} terms "
+                      f"in {index_stats['term_shards']} term shards, {index_stats['posting_files']} posting files "
+                      f"and {index_stats['doc_shards']} document chunks")
+                print(f"  Search index size: {index_stats['bytes'] / 1024:.1f} KiB, "
+                      f"built in {index_stats['seconds']:.2f}s ({search_index_dir})")
             print(f"  Total processing time: {time_str}")
+            print(f"  Time per phase: {self.metrics.format_phases()}")
             print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
         except sqlite3.Error as e:
@@ -270,6 +873,56 @@ class TwitterToMarkdownExporter:
             print(f"Unexpected error: {e}")
 
 
+# Stats that worker processes count on their own and report back per chunk
+WORKER_STATS = ('tweets_with_urls', 'urls_replaced', 'urls_failed')
+
+# Exporter used by a worker process, set up once per process by init_render_worker()
+worker_exporter = None
+
+def init_render_worker(url_map, manifest=None, collect_search_docs=False, layout='flat'):
+    """Set up the exporter of a worker process with the URL mappings.
+    
+    Args:
+        url_map (dict): Mapping of original URLs to resolved URLs
+        manifest (dict): Content hashes of the previous run, for incremental exports
+        collect_search_docs (bool): Return the rendered tweets for the search index
+        layout (str): Markdown layout, see MARKDOWN_LAYOUTS
+    """
+    global worker_exporter
+    worker_exporter = TwitterToMarkdownExporter(None)
+    worker_exporter.url_map = url_map
+    worker_exporter.manifest = manifest
+    worker_exporter.collect_search_docs = collect_search_docs
+    worker_exporter.layout = layout
+
+def write_tweet_chunk(chunk, output_dir, url_updates=None):
+    """Write a chunk of tweets in a worker process.
+    
+    Args:
+        chunk (list): (index, tweet row) pairs
+        output_dir (str): Directory to save markdown files
+        url_updates (dict): URL mappings resolved after the worker was started
+        
+    Returns:
+        tuple: (result counts, URL stats for this chunk, content hashes of rendered
+                files, tweets for the search index, phase timings, index of the last tweet)
+    """
+    exporter = worker_exporter
+    if url_updates:
+        exporter.url_map.update(url_updates)
+    for key in WORKER_STATS:
+        exporter.stats[key] = 0
+    exporter.rendered = {}
+    exporter.search_docs = []
+    
+    counts = dict.fromkeys(EXPORT_RESULTS, 0)
+    for index, data in chunk:
+        counts[exporter.write_tweet(data, output_dir, index)] += 1
+    
+    return (counts, {key: exporter.stats[key] for key in WORKER_STATS}, exporter.rendered,
+            exporter.search_docs, exporter.metrics.take_phases(), chunk[-1][0])
+
+
 def main():
     """Main function to handle command line arguments and execute the export process."""
     
@@ -281,6 +934,12 @@ Examples:
   # Basic usage with resolved URLs in same database
   python sql_extraction.py --db-path data.sqlite3 --tweet-table tweet --output-dir ./src/content/tweets
   
+  # Nightly rebuild: only rewrite changed files and remove files of deleted tweets
+  python sql_extraction.py --db-path data.sqlite3 --tweet-table tweet --output-dir ./src/content/tweets --incremental --delete-orphans
+  
+  # One JSON data file per month instead of one markdown file per tweet
+  python sql_extraction.py --db-path data.sqlite3 --tweet-table tweet --output-dir ./src/data/tweets --output-format json
+  
   # Custom URL table name
   python sql_extraction.py --db-path data.sqlite3 --tweet-table tweet --url-table my_resolved_urls --output-dir ./markdown_output
         """
@@ -314,6 +973,80 @@ Examples:
         help="Directory to save the exported markdown files"
     )
     
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Number of rows fetched from the database at a time (default: {DEFAULT_CHUNK_SIZE})"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes rendering and writing files, 0 = one per CPU core (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Keep a manifest of content hashes ({MANIFEST_FILENAME}) and only rewrite files whose content changed"
+    )
+    
+    parser.add_argument(
+        "--since-last-run",
+        action="store_true",
+        help="Only query tweets added or deleted since the last incremental run (implies --incremental)"
+    )
+    
+    parser.add_argument(
+        "--delete-orphans",
+        action="store_true",
+        help="With --incremental, delete files of tweets that are no longer in the database"
+    )
+    
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help=f"Path of the incremental export manifest (default: {MANIFEST_FILENAME} in the output directory)"
+    )
+    
+    parser.add_argument(
+        "--search-index-dir",
+        type=str,
+        help="Also build the prebuilt search index into this directory (e.g. ../public/search-index)"
+    )
+    
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="markdown",
+        help="One markdown file per tweet, or consolidated json/ndjson data files (default: markdown)"
+    )
+    
+    parser.add_argument(
+        "--group-by",
+        choices=BULK_GROUPS,
+        default="month",
+        help="Write one data file per month of createdAt or per --tweets-per-file tweets (default: month)"
+    )
+    
+    parser.add_argument(
+        "--tweets-per-file",
+        type=int,
+        default=DEFAULT_TWEETS_PER_FILE,
+        help=f"Number of tweets per data file with --group-by count (default: {DEFAULT_TWEETS_PER_FILE})"
+    )
+    
+    parser.add_argument(
+        "--layout",
+        choices=MARKDOWN_LAYOUTS,
+        default="flat",
+        help="Put markdown files into the output directory or into hashed subdirectories (default: flat)"
+    )
+    
+    add_metrics_arguments(parser)
+    
     parser.add_argument(
         "--config",
         type=str,
@@ -344,7 +1077,22 @@ Examples:
             
             # Create exporter and run with config
             exporter = TwitterToMarkdownExporter(db_path)
-            exporter.export_to_markdown(tweet_table, output_dir, url_table)
+            exporter.quiet = args.quiet
+            output = config.get('output', {})
+            workers = output.get('workers', args.workers) or os.cpu_count() or 1
+            with collect_metrics(exporter.metrics, args):
+                exporter.export_to_markdown(
+                    tweet_table, output_dir, url_table, args.chunk_size, workers,
+                    incremental=output.get('incremental', args.incremental),
+                    since_last_run=output.get('since_last_run', args.since_last_run),
+                    delete_orphans=output.get('delete_orphans', args.delete_orphans),
+                    manifest_path=output.get('manifest', args.manifest),
+                    search_index_dir=output.get('search_index_directory', args.search_index_dir),
+                    output_format=output.get('format', args.output_format),
+                    group_by=output.get('group_by', args.group_by),
+                    tweets_per_file=output.get('tweets_per_file', args.tweets_per_file),
+                    layout=output.get('layout', args.layout)
+                )
             return
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON in config file: {e}")
@@ -360,7 +1108,21 @@ Examples:
     
     # Create exporter and run
     exporter = TwitterToMarkdownExporter(args.db_path)
-    exporter.export_to_markdown(args.tweet_table, args.output_dir, args.url_table)
+    exporter.quiet = args.quiet
+    workers = args.workers or os.cpu_count() or 1
+    with collect_metrics(exporter.metrics, args):
+        exporter.export_to_markdown(
+            args.tweet_table, args.output_dir, args.url_table, args.chunk_size, workers,
+            incremental=args.incremental,
+            since_last_run=args.since_last_run,
+            delete_orphans=args.delete_orphans,
+            manifest_path=args.manifest,
+            search_index_dir=args.search_index_dir,
+            output_format=args.output_format,
+            group_by=args.group_by,
+            tweets_per_file=args.tweets_per_file,
+            layout=args.layout
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+"""
+Social Media Archive - t.co Link Helpers
+
+Shared by url_extraction.py, sql_extraction.py and build_archive.py, so finding
+t.co links and rewriting them into markdown links works the same everywhere.
+
+Copyright (C) 2025 Freifunk
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+
+# t.co short links only use letters and digits, so trailing punctuation
+# like "https://t.co/abc123." is not part of the link
+TCO_PATTERN = re.compile(r'https://t\.co/[A-Za-z0-9]+')
+
+
+def find_tco_urls(text):
+    """Find all t.co URLs in a text.
+
+    Args:
+        text (str): Text containing potential t.co links
+
+    Returns:
+        list: The t.co URLs in order of appearance (may contain duplicates)
+    """
+    if not text:
+        return []
+    return TCO_PATTERN.findall(text)
+
+
+@lru_cache(maxsize=65536)
+def markdown_link(resolved_url):
+    """Format a resolved URL as a markdown link with its domain as display text.
+
+    Args:
+        resolved_url (str): The resolved URL
+
+    Returns:
+        str: Markdown link [display_text](url)
+    """
+    try:
+        domain = urlparse(resolved_url).netloc
+    except ValueError:
+        domain = None
+    display_text = domain if domain else resolved_url
+    return f"[{display_text}]({resolved_url})"
+
+
+def rewrite_tco_links(text, url_map):
+    """Replace t.co links with markdown links to their resolved URLs in a single pass.
+
+    Args:
+        text (str): Text containing potential t.co links
+        url_map (dict): Mapping of t.co URLs to resolved URLs
+
+    Returns:
+        tuple: (rewritten text, number of replaced links, number of links left as t.co)
+    """
+    if not text:
+        return text, 0, 0
+
+    replaced = 0
+    failed = 0
+
+    def replacer(match):
+        nonlocal replaced, failed
+        short_url = match.group()
+        resolved_url = url_map.get(short_url)
+        if resolved_url:
+            replaced += 1
+            return markdown_link(resolved_url)
+        # Keep original t.co link if no resolution found
+        failed += 1
+        return short_url
+
+    return TCO_PATTERN.sub(replacer, text), replaced, failed
@@ -0,0 +1,12 @@
+import os
+import sys
+
+BUILD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The build scripts are plain modules in build/, make them importable in the tests
+sys.path.insert(0, BUILD_DIR)
+sys.path.insert(0, os.path.join(BUILD_DIR, "benchmarks"))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: exports large synthetic archives (deselect with -m 'not slow')")
@@ -0,0 +1,64 @@
+"""
+Peak memory of the streaming export does not grow with the archive size.
+
+Each export runs in its own Python process, and its peak is read from VmHWM:
+ru_maxrss of a process started with fork and exec also counts the memory of
+the test process before the exec (see benchmarks/run_benchmarks.py).
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BUILD_DIR
+from generate_archive import generate_archive
+
+SMALL_ARCHIVE = 2000
+LARGE_ARCHIVE = 200000
+# Measured from 2,000 to 400,000 tweets: about +1.5 MiB for the export,
+# about +5.5 MiB with the search index
+MAX_GROWTH_MB = 10
+
+EXPORT_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from sql_extraction import TwitterToMarkdownExporter
+TwitterToMarkdownExporter(sys.argv[2]).export_to_markdown('tweet', sys.argv[3], chunk_size=1000,
+                                                          search_index_dir=sys.argv[4] or None)
+with open('/proc/self/status') as f:
+    print(next(line.split()[1] for line in f if line.startswith('VmHWM:')))
+"""
+
+
+@pytest.fixture(scope="module")
+def archives(tmp_path_factory):
+    """Generate the small and the large archive once for all tests."""
+    directory = tmp_path_factory.mktemp("archives")
+    paths = {}
+    for tweets in (SMALL_ARCHIVE, LARGE_ARCHIVE):
+        paths[tweets] = str(directory / f"archive-{tweets}.sqlite3")
+        generate_archive(paths[tweets], tweets)
+    return paths
+
+
+def export_peak_memory_mb(tmp_path, db_path, tweets, search_index=False):
+    """Export an archive in a fresh process and return its peak memory in MiB."""
+    output_dir = str(tmp_path / f"tweets-{tweets}")
+    index_dir = str(tmp_path / f"search-index-{tweets}") if search_index else ""
+    result = subprocess.run([sys.executable, "-c", EXPORT_SCRIPT, BUILD_DIR, db_path, output_dir, index_dir],
+                            capture_output=True, text=True, check=True)
+    assert len(os.listdir(output_dir)) == tweets
+    if search_index:
+        assert os.path.exists(os.path.join(index_dir, "meta.json"))
+    return int(result.stdout.split()[-1]) / 1024
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason="reads VmHWM from /proc")
+@pytest.mark.parametrize("search_index", [False, True], ids=["export", "search_index"])
+def test_export_peak_memory_is_flat(tmp_path, archives, search_index):
+    small = export_peak_memory_mb(tmp_path, archives[SMALL_ARCHIVE], SMALL_ARCHIVE, search_index)
+    large = export_peak_memory_mb(tmp_path, archives[LARGE_ARCHIVE], LARGE_ARCHIVE, search_index)
+    assert large - small < MAX_GROWTH_MB, f"{small:.1f} MiB at {SMALL_ARCHIVE} tweets, {large:.1f} MiB at {LARGE_ARCHIVE}"
@@ -2,7 +2,8 @@
 Social Media Archive - URL Resolution Script
 
 This script finds and resolves t.co URLs in a given string text to their original links,
-then saves the results to a table in the same SQLite database. The results are also printed in the terminal.
+then saves the results to a table in the same SQLite database. Progress is printed in the terminal,
+every single result with --verbose.
 
 Copyright (C) 2025 Freifunk
 
@@ -25,23 +26,41 @@ Date: 2025-08-03
 """
 
 import requests
-import re
+from requests.adapters import HTTPAdapter
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 import argparse
+import threading
 import time
 import signal
 import sys
+from tco_links import find_tco_urls
+from metrics import Metrics, add_metrics_arguments, collect_metrics
 
 # Global variables for clean shutdown
 connections = {}
 start_time = None
 processed_count = 0
+# Results that have not been written to the database yet, flushed on Ctrl+C
+pending_results = []
+pending_table = None
 
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     print("\n" + "="*80)
     print("Interrupted by user (Ctrl+C)")
+
+    # Save finished results so the next run can pick up where this one stopped
+    conn = connections.get('main')
+    if conn and pending_results:
+        try:
+            flush_results(conn, pending_table)
+            print("Saved pending results before exiting")
+        except sqlite3.Error as e:
+            print(f"Could not save pending results: {e}")
     
     # Close database connections
     for name, conn in connections.items():
@@ -66,7 +85,7 @@ def signal_handler(sig, frame):
         else:
             time_str = f"{seconds:.2f}s"
         
-        print(f"Processed {processed_count} tweets before interruption")
+        print(f"Resolved {processed_count} URLs before interruption")
         print(f"Elapsed time: {time_str}")
     
     print(f"Program terminated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -76,44 +95,243 @@ def signal_handler(sig, frame):
 # Set up signal handler for Ctrl+C
 signal.signal(signal.SIGINT, signal_handler)
 
-def resolve_tco_url(tco_url):
+# Defaults for the url_resolution section of the config file
+DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_RETRY_FAILED_AFTER_HOURS = 24
+DEFAULT_MAX_FAILED_ATTEMPTS = 3
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CHUNK_SIZE = 1000
+
+# HTTP status codes that are worth retrying after a backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 10
+# Upper bound for a single backoff, also when a host sends a longer Retry-After
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+class HostRateLimiter:
+    """Thread-safe limiter that spaces out requests to the same host.
+
+    Every host gets its own schedule, so a slow or strict host does not hold
+    back requests to other hosts.
+    """
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        """Initialize the limiter.
+
+        Args:
+            requests_per_second (float): Maximum request rate per host (0 disables the limit)
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host):
+        """Block until a request to host is allowed.
+
+        Args:
+            host (str): The host name the next request goes to.
+        """
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def backoff(self, host, seconds):
+        """Push back every pending request to host, e.g. after a 429 response.
+
+        Args:
+            host (str): The host name that asked us to slow down.
+            seconds (float): How long to keep the host quiet.
+        """
+        with self.lock:
+            resume_at = time.monotonic() + seconds
+            self.next_slot[host] = max(self.next_slot.get(host, 0.0), resume_at)
+
+
+def create_session(pool_size=DEFAULT_CONCURRENCY):
+    """Create a requests session with a connection pool sized for the worker count.
+
+    Args:
+        pool_size (int): Number of connections to keep open per host.
+    Returns:
+        requests.Session: Session that reuses connections between requests.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _retry_delay(response, attempt):
+    """Return how long to wait before retrying, honouring Retry-After if present.
+
+    The delay is capped at MAX_RETRY_DELAY_SECONDS, so a host asking for hours
+    neither blocks a worker thread nor every later request to that host.
+    """
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_DELAY_SECONDS)
+    return min(0.5 * (2 ** attempt), MAX_RETRY_DELAY_SECONDS)
+
+
+def _follow_redirects(url, session, timeout, rate_limiter, metrics=None):
+    """Follow the redirect chain of url one hop at a time.
+
+    Each hop goes through the rate limiter of its own host, and its latency
+    is recorded per host if metrics are given. Once a redirect leaves the host
+    of the first URL (t.co), the link is resolved: the status of the
+    destination does not matter, and an error of a later hop ends the chain
+    at the last URL reached.
+
+    Returns:
+        tuple: (final URL, last response of the first host, or None once the chain left it)
+    """
+    origin = urlparse(url).netloc
+    left_origin = False
+    response = None
+    for _ in range(MAX_REDIRECTS + 1):
+        host = urlparse(url).netloc
+        left_origin = left_origin or host != origin
+        if rate_limiter:
+            rate_limiter.wait(host)
+        started = time.perf_counter()
+        try:
+            response = session.head(url, allow_redirects=False, timeout=timeout)
+            if not response.is_redirect:
+                return url, None if left_origin else response
+            next_url = urljoin(url, response.headers['Location'])
+            urlparse(next_url)
+        except Exception:
+            # Includes invalid Location headers (ValueError), not only network errors
+            if not left_origin:
+                raise
+            return url, None
+        finally:
+            if metrics:
+                metrics.observe_latency(host, time.perf_counter() - started)
+        url = next_url
+    if left_origin:
+        return url, None
+    raise requests.TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects")
+
+def resolve_tco_url(tco_url, session=None, timeout=DEFAULT_TIMEOUT_SECONDS,
+                    max_retries=0, rate_limiter=None, base_url=None, metrics=None):
     """Resolve a t.co URL to its final destination.
     Args:
         tco_url (str): The t.co URL to resolve.
+        session (requests.Session): Session to reuse connections from (a new one is created if None).
+        timeout (float): Timeout in seconds for each HTTP request.
+        max_retries (int): How often to retry after a network error or a retryable HTTP status.
+        rate_limiter (HostRateLimiter): Optional per-host rate limiter.
+        base_url (str): Optional base URL that replaces https://t.co for the request,
+            e.g. a local stand-in server for testing. The stored original_url is unchanged.
+        metrics (Metrics): Optional metrics recording the latency of every request.
     Returns:
         dict: A dictionary containing the original URL, status, resolved URL or error message, and timestamp.
     """
 
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.head(tco_url, allow_redirects=True, headers=headers, timeout=10)
-        resolved_url = response.url
-        
-        # Check if the URL actually resolved (not still a t.co link)
-        if resolved_url == tco_url or 't.co/' in resolved_url:
-            return {
-                'original_url': tco_url,
-                'status': 'FAILED',
-                'resolved_url': 'URL not resolved or invalid link',
-                'timestamp': datetime.now().isoformat()
-            }
+    if session is None:
+        session = create_session(pool_size=1)
+
+    request_url = tco_url
+    if base_url:
+        request_url = base_url.rstrip('/') + '/' + tco_url.rsplit('/', 1)[-1]
+
+    error = None
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            resolved_url, response = _follow_redirects(request_url, session, timeout, rate_limiter, metrics)
+        except requests.RequestException as e:
+            error = str(e)
+        except Exception as e:
+            # E.g. an invalid Location header, a retry would fail the same way.
+            # Any error only fails this URL, never the whole run
+            error = f"{type(e).__name__}: {e}"
+            break
         else:
-            return {
-                'original_url': tco_url,
-                'status': 'SUCCESS',
-                'resolved_url': resolved_url,
-                'timestamp': datetime.now().isoformat()
-            }
-    except Exception as e:
+            # Only errors of t.co itself are worth a retry
+            if response is None or response.status_code not in RETRY_STATUS_CODES:
+                error = None
+                break
+            error = f"HTTP {response.status_code}"
+            if rate_limiter and response.status_code == 429:
+                rate_limiter.backoff(urlparse(response.url or request_url).netloc,
+                                     _retry_delay(response, attempt))
+
+        if attempt < max_retries:
+            time.sleep(_retry_delay(response, attempt))
+
+    if error is not None:
+        return {
+            'original_url': tco_url,
+            'status': 'FAILED',
+            'resolved_url': error,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    # Check if the URL actually resolved (not still a t.co link)
+    if resolved_url == request_url or 't.co/' in resolved_url:
         return {
             'original_url': tco_url,
             'status': 'FAILED',
-            'resolved_url': str(e),
+            'resolved_url': 'URL not resolved or invalid link',
             'timestamp': datetime.now().isoformat()
         }
+    else:
+        return {
+            'original_url': tco_url,
+            'status': 'SUCCESS',
+            'resolved_url': resolved_url,
+            'timestamp': datetime.now().isoformat()
+        }
+
+
+def resolve_tco_urls_concurrently(tco_urls, workers=DEFAULT_CONCURRENCY, **resolve_kwargs):
+    """Resolve many t.co URLs with a bounded pool of worker threads.
+
+    Results are yielded in the same order as the input URLs, so the caller can
+    write them to the database from a single thread.
+
+    Args:
+        tco_urls (iterable): The t.co URLs to resolve.
+        workers (int): Number of requests in flight at the same time.
+        **resolve_kwargs: Passed on to resolve_tco_url() (session, timeout, ...).
+    Yields:
+        dict: One result per input URL, see resolve_tco_url().
+    """
+    workers = max(1, workers)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for tco_url in tco_urls:
+            pending.append(executor.submit(resolve_tco_url, tco_url, **resolve_kwargs))
+            # Keep a small window of work queued so the input is consumed lazily
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Don't start queued requests if the caller stops early (e.g. Ctrl+C)
+        executor.shutdown(wait=False, cancel_futures=True)
 
 def init_resolved_urls_table(conn, table_name='resolved_urls'):
     """Initialize the resolved_urls table in the existing database.
@@ -137,91 +355,222 @@ def init_resolved_urls_table(conn, table_name='resolved_urls'):
             UNIQUE(original_url, timestamp)
         )
     ''')
+
+    # Lookups by original_url are needed to skip already resolved links
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_{table_name}_original_url
+        ON {table_name} (original_url, status)
+    ''')
     
     conn.commit()
     return cursor
 
-def find_and_resolve_tco_urls(text, cursor, table_name='resolved_urls'):
-    """Find all t.co URLs in text, resolve them, and save to SQLite database.
+def iter_tweet_texts(cursor, tweet_table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream the text of every tweet without loading the whole table.
     Args:
-        text (str): The input text containing t.co URLs.
         cursor (sqlite3.Cursor): The SQLite cursor to execute database operations.
-        table_name (str): The name of the table to store resolved URLs.
+        tweet_table (str): The name of the table containing tweets.
+        chunk_size (int): Number of rows fetched at a time.
+    Yields:
+        str: The stripped text of each tweet.
+    """
+    cursor.execute(f"SELECT text FROM {tweet_table};")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for row in rows:
+            yield (row[0] or "").strip()
+
+def load_resolution_state(cursor, table_name='resolved_urls'):
+    """Load what earlier runs already know about each t.co URL.
+    Args:
+        cursor (sqlite3.Cursor): The SQLite cursor to execute database operations.
+        table_name (str): The name of the table storing resolved URLs.
     Returns:
-        None
-    Output:
-        Prints the results to the console and saves them to the SQLite database.
+        tuple: (set of successfully resolved URLs,
+                dict mapping failed URLs to (number of days with a failed attempt,
+                last attempt timestamp))
     """
+    cursor.execute(f"SELECT DISTINCT original_url FROM {table_name} WHERE status = 'SUCCESS'")
+    resolved = {row[0] for row in cursor.fetchall()}
 
-    # Regex pattern to find t.co URLs
-    tco_pattern = r'https://t\.co/[A-Za-z0-9]+'
-    
-    # Find all t.co URLs in the text
-    tco_urls = re.findall(tco_pattern, text)
-    
-    if not tco_urls:
-        return
+    # Every failed attempt is stored as its own row, so the rows double as an attempt
+    # log. Databases of the original script have one row per tweet containing the
+    # link, so rows are counted as one attempt per day (the default retry window)
+    cursor.execute(f'''
+        SELECT original_url, COUNT(DISTINCT substr(timestamp, 1, 10)), MAX(timestamp)
+        FROM {table_name}
+        WHERE status = 'FAILED'
+        GROUP BY original_url
+    ''')
+    failed = {row[0]: (row[1], row[2]) for row in cursor.fetchall() if row[0] not in resolved}
+
+    return resolved, failed
+
+def select_urls_to_resolve(tco_urls, resolved, failed,
+                           retry_failed_after_hours=DEFAULT_RETRY_FAILED_AFTER_HOURS,
+                           max_failed_attempts=DEFAULT_MAX_FAILED_ATTEMPTS):
+    """Decide which of the given URLs need an HTTP request in this run.
+    Args:
+        tco_urls (iterable): Unique t.co URLs found in the tweets.
+        resolved (set): URLs that already have a SUCCESS row.
+        failed (dict): Failed URLs mapped to (attempt count, last attempt timestamp).
+        retry_failed_after_hours (float): Minimum age of the last failed attempt before retrying.
+        max_failed_attempts (int): Stop retrying a URL after this many failed attempts.
+    Returns:
+        tuple: (list of URLs to resolve, number of skipped resolved URLs, number of skipped failed URLs)
+    """
+    retry_before = datetime.now() - timedelta(hours=retry_failed_after_hours)
+    to_resolve = []
+    skipped_resolved = 0
+    skipped_failed = 0
 
-    # Process each URL
     for tco_url in tco_urls:
-        # Resolve the URL
-        result = resolve_tco_url(tco_url)
-        
-        # Print results
-        status = result['status']
-        resolved = result['resolved_url']
-        print(f"{result['original_url']:<30} {status:<10} {resolved}")
-        
-        # Save to SQLite database
-        try:
-            cursor.execute(f'''
-                INSERT INTO {table_name} (original_url, status, resolved_url, timestamp)
-                VALUES (?, ?, ?, ?)
-            ''', (result['original_url'], result['status'], result['resolved_url'], result['timestamp']))
-            
-        except sqlite3.IntegrityError:
-            # Handle duplicate entries (same URL and timestamp)
-            pass
+        if tco_url in resolved:
+            skipped_resolved += 1
+        elif tco_url in failed:
+            attempts, last_attempt = failed[tco_url]
+            if attempts < max_failed_attempts and datetime.fromisoformat(last_attempt) <= retry_before:
+                to_resolve.append(tco_url)
+            else:
+                skipped_failed += 1
+        else:
+            to_resolve.append(tco_url)
+
+    return to_resolve, skipped_resolved, skipped_failed
 
+def print_result(result):
+    """Print a resolution result as a row of the results table.
+    Args:
+        result (dict): A result as returned by resolve_tco_url().
+    """
+    print(f"{result['original_url']:<30} {result['status']:<10} {result['resolved_url']}")
 
-def main(db_path, tweet_table='tweets', url_table='resolved_urls'):
-    global connections, start_time, processed_count
+def save_results(cursor, results, table_name='resolved_urls'):
+    """Save resolution results to the SQLite database in one statement.
+    Args:
+        cursor (sqlite3.Cursor): The SQLite cursor to execute database operations.
+        results (list): Results as returned by resolve_tco_url().
+        table_name (str): The name of the table to store resolved URLs.
+    """
+    # Duplicate entries (same URL and timestamp) are ignored
+    cursor.executemany(f'''
+        INSERT OR IGNORE INTO {table_name} (original_url, status, resolved_url, timestamp)
+        VALUES (?, ?, ?, ?)
+    ''', [(r['original_url'], r['status'], r['resolved_url'], r['timestamp']) for r in results])
+
+def flush_results(conn, table_name='resolved_urls'):
+    """Write all pending results in a single transaction.
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        table_name (str): The name of the table to store resolved URLs.
+    """
+    if not pending_results:
+        return
+    with conn:
+        save_results(conn.cursor(), pending_results, table_name)
+    pending_results.clear()
+
+
+def main(db_path, tweet_table='tweets', url_table='resolved_urls', workers=DEFAULT_CONCURRENCY,
+         timeout=DEFAULT_TIMEOUT_SECONDS, max_retries=DEFAULT_MAX_RETRIES,
+         requests_per_second=DEFAULT_REQUESTS_PER_SECOND, base_url=None,
+         retry_failed_after_hours=DEFAULT_RETRY_FAILED_AFTER_HOURS,
+         max_failed_attempts=DEFAULT_MAX_FAILED_ATTEMPTS, batch_size=DEFAULT_BATCH_SIZE,
+         chunk_size=DEFAULT_CHUNK_SIZE, verbose=False, quiet=False, metrics=None):
+    global connections, start_time, processed_count, pending_table
+    
+    metrics = metrics or Metrics('url_extraction')
     
     # Start timing
     start_time = time.time()
     processed_count = 0
+    pending_results.clear()
+    pending_table = url_table
     print(f"Starting URL resolution at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Using {workers} worker(s), {timeout}s timeout, {max_retries} retries, "
+          f"{requests_per_second} requests/s per host")
     print("-" * 80)
 
     # Connect to the database (same one for both tweets and resolved URLs)
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     connections['main'] = conn
 
     # Initialize the resolved_urls table
     cursor = init_resolved_urls_table(conn, url_table)
 
-    # Retrieve all tweets from the specified tweet table
-    cursor.execute(f"SELECT * FROM {tweet_table};")
-    rows = cursor.fetchall()
-
-    if not rows:
+    # Collect the unique set of short URLs, in the order they first appear.
+    # Only the text column is read, and tweets are streamed in chunks.
+    unique_urls = {}
+    tweet_count = 0
+    with metrics.phase('scan'):
+        for text in iter_tweet_texts(cursor, tweet_table, chunk_size):
+            tweet_count += 1
+            for tco_url in find_tco_urls(text):
+                unique_urls[tco_url] = None
+
+    if not tweet_count:
         print(f"No data found in table '{tweet_table}'.")
         conn.close()
-        return
-    
-    # Print table header
-    print(f"{'Original URL':<30} {'Status':<10} {'Resolved URL / Error'}")
+        return metrics
+
+    # Skip everything earlier runs already resolved, retry failures by policy
+    with metrics.phase('load_state'):
+        resolved, failed = load_resolution_state(cursor, url_table)
+        to_resolve, skipped_resolved, skipped_failed = select_urls_to_resolve(
+            unique_urls, resolved, failed, retry_failed_after_hours, max_failed_attempts
+        )
+    metrics.update_counters({
+        'tweets': tweet_count,
+        'unique_urls': len(unique_urls),
+        'skipped_resolved': skipped_resolved,
+        'skipped_failed': skipped_failed,
+        'to_resolve': len(to_resolve),
+    })
+    print(f"Found {len(unique_urls)} unique t.co URLs in {tweet_count} tweets")
+    print(f"  Already resolved: {skipped_resolved}")
+    print(f"  Failed, not due for retry: {skipped_failed}")
+    print(f"  To resolve now: {len(to_resolve)}")
     print("-" * 80)
 
-    for row in rows:
-        # Convert Row object to a dictionary
-        data = dict(row)
-        # Extract tweet text
-        text = data.get("text", "").strip()
-        find_and_resolve_tco_urls(text, cursor, url_table)
-        conn.commit()
-        processed_count += 1
+    if to_resolve:
+        if verbose:
+            # Print table header
+            print(f"{'Original URL':<30} {'Status':<10} {'Resolved URL / Error'}")
+            print("-" * 80)
+
+        # Resolve in worker threads, but write to the database from this thread only
+        session = create_session(pool_size=workers)
+        rate_limiter = HostRateLimiter(requests_per_second)
+        results = resolve_tco_urls_concurrently(
+            to_resolve, workers,
+            session=session, timeout=timeout, max_retries=max_retries,
+            rate_limiter=rate_limiter, base_url=base_url, metrics=metrics
+        )
+        # Time spent waiting for results, the requests themselves run in the workers
+        waited = time.perf_counter()
+        try:
+            for result in results:
+                metrics.add_phase('resolve', time.perf_counter() - waited)
+                metrics.count('resolved' if result['status'] == 'SUCCESS' else 'failed')
+                if verbose:
+                    print_result(result)
+                pending_results.append(result)
+                processed_count += 1
+                if len(pending_results) >= batch_size:
+                    with metrics.phase('write'):
+                        flush_results(conn, url_table)
+                if metrics.sample_throughput('urls', processed_count) and not quiet and not verbose:
+                    print(f"Resolved {processed_count}/{len(to_resolve)} URLs ({metrics.rate('urls'):.1f}/s)")
+                waited = time.perf_counter()
+        finally:
+            # Also save what was resolved when the loop stops with an error,
+            # so the next run continues where this one stopped
+            with metrics.phase('write'):
+                flush_results(conn, url_table)
+            session.close()
+        metrics.sample_throughput('urls', processed_count, force=True)
 
     print("-" * 80)
     
@@ -242,12 +591,15 @@ def main(db_path, tweet_table='tweets', url_table='resolved_urls'):
         time_str = f"{seconds:.2f}s"
     
     print(f"Results saved to '{url_table}' table in {db_path}")
-    print(f"Total {len(rows)} tweets processed in {time_str}")
+    print(f"Total {tweet_count} tweets processed, {processed_count} URLs resolved in {time_str}")
+    if processed_count:
+        print(f"  Succeeded: {metrics.counters.get('resolved', 0)}, failed: {metrics.counters.get('failed', 0)}")
+    print(f"  Time per phase: {metrics.format_phases()}")
     print(f"Processing completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
     conn.close()
     connections.clear()
-    return
+    return metrics
 
 
 def cli_main():
@@ -258,6 +610,7 @@ def cli_main():
         epilog="""
             Examples:
             python url_extraction_sql.py --db-path data.sqlite3 --tweet-table tweet --url-table resolved_urls
+            python url_extraction_sql.py --db-path data.sqlite3 --tweet-table tweet --workers 16 --rate-limit 10
             """
     )
 
@@ -280,6 +633,66 @@ def cli_main():
         help="Name of the table to create/use for storing resolved URLs (default: resolved_urls)."
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Number of URLs to resolve concurrently (default: {DEFAULT_CONCURRENCY}, 1 = sequential)."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT_SECONDS,
+        help=f"Timeout in seconds for each HTTP request (default: {DEFAULT_TIMEOUT_SECONDS})."
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries per URL after a network error or HTTP 429/5xx (default: {DEFAULT_MAX_RETRIES})."
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+        help=f"Maximum requests per second to a single host, 0 = unlimited (default: {DEFAULT_REQUESTS_PER_SECOND})."
+    )
+    parser.add_argument(
+        "--retry-failed-after",
+        type=float,
+        default=DEFAULT_RETRY_FAILED_AFTER_HOURS,
+        help=f"Retry a FAILED URL once its last attempt is this many hours old (default: {DEFAULT_RETRY_FAILED_AFTER_HOURS})."
+    )
+    parser.add_argument(
+        "--max-failed-attempts",
+        type=int,
+        default=DEFAULT_MAX_FAILED_ATTEMPTS,
+        help=f"Give up on a URL after failed attempts on this many days (default: {DEFAULT_MAX_FAILED_ATTEMPTS})."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Number of results written per database transaction (default: {DEFAULT_BATCH_SIZE})."
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Number of tweets fetched from the database at a time (default: {DEFAULT_CHUNK_SIZE})."
+    )
+    parser.add_argument(
+        "--resolve-base-url",
+        type=str,
+        help="Send requests to this base URL instead of https://t.co (e.g. a local stand-in server for testing)."
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print every resolved URL instead of a progress line every few seconds."
+    )
+    add_metrics_arguments(parser)
+    
     parser.add_argument(
         "--config",
         type=str,
@@ -287,6 +700,19 @@ def cli_main():
     )
 
     args = parser.parse_args()
+    resolve_options = {
+        'workers': args.workers,
+        'timeout': args.timeout,
+        'max_retries': args.max_retries,
+        'requests_per_second': args.rate_limit,
+        'base_url': args.resolve_base_url,
+        'retry_failed_after_hours': args.retry_failed_after,
+        'max_failed_attempts': args.max_failed_attempts,
+        'batch_size': args.batch_size,
+        'chunk_size': args.chunk_size,
+        'verbose': args.verbose,
+        'quiet': args.quiet,
+    }
     
     # Load config from file if provided
     if args.config:
@@ -304,13 +730,27 @@ def cli_main():
             db_path = config.get('database', {}).get('path', args.db_path)
             tweet_table = config.get('database', {}).get('tweet_table', args.tweet_table)
             url_table = config.get('database', {}).get('url_table', args.url_table or 'resolved_urls')
+            resolution = config.get('url_resolution', {})
             
             # Validate required fields
             if not db_path or not tweet_table:
                 print("Error: Config file must contain database.path and database.tweet_table")
                 return
+
+            if not resolution.get('enabled', True):
+                print("URL resolution is disabled in the config file (url_resolution.enabled)")
+                return
+
+            resolve_options['workers'] = resolution.get('concurrency', args.workers)
+            resolve_options['timeout'] = resolution.get('timeout_seconds', args.timeout)
+            resolve_options['max_retries'] = resolution.get('max_retries', args.max_retries)
+            resolve_options['requests_per_second'] = resolution.get('requests_per_second', args.rate_limit)
+            resolve_options['retry_failed_after_hours'] = resolution.get('retry_failed_after_hours', args.retry_failed_after)
+            resolve_options['max_failed_attempts'] = resolution.get('max_failed_attempts', args.max_failed_attempts)
+            resolve_options['batch_size'] = resolution.get('batch_size', args.batch_size)
             
-            main(db_path, tweet_table, url_table)
+            with collect_metrics(Metrics('url_extraction'), args) as metrics:
+                main(db_path, tweet_table, url_table, metrics=metrics, **resolve_options)
             return
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON in config file: {e}")
@@ -324,7 +764,8 @@ def cli_main():
         print("Error: --db-path and --tweet-table are required when not using --config")
         return
 
-    main(args.db_path, args.tweet_table, args.url_table)
+    with collect_metrics(Metrics('url_extraction'), args) as metrics:
+        main(args.db_path, args.tweet_table, args.url_table, metrics=metrics, **resolve_options)
 
 
 if __name__ == "__main__":
@@ -46,6 +46,9 @@ export const searchConfig = {
   
   // API endpoints
   endpoints: {
-    searchData: '/search.json'
+    // Fallback when no prebuilt index was generated
+    searchData: '/search.json',
+    // Prebuilt index written by build/sql_extraction.py --search-index-dir
+    searchIndex: '/search-index'
   }
 };
\ No newline at end of file
@@ -1,9 +1,28 @@
+import { existsSync } from "node:fs";
+import { basename } from "node:path";
 // Import the glob loader
 import { glob } from "astro/loaders";
 // Import utilities from `astro:content`
 import { z, defineCollection } from "astro:content";
+import { tweetData } from "./loaders/tweetData";
+
+// Tweets exported with `sql_extraction.py --output-format json/ndjson` are read
+// from data files here, otherwise from the markdown files (flat or --layout hashed)
+const TWEET_DATA_DIR = "./src/data/tweets";
+const TWEET_MARKDOWN_DIR = "./src/content/tweets";
+
+const tweetLoader = existsSync(TWEET_DATA_DIR)
+  ? tweetData({ base: TWEET_DATA_DIR })
+  : glob({
+      pattern: "**/*.md",
+      base: TWEET_MARKDOWN_DIR,
+      // The id stays the tweetID, also for files in hashed subdirectories
+      generateId: ({ entry }) => basename(entry, ".md"),
+    });
+
 // Define a `loader` and `schema` for each collection
 const tweets = defineCollection({
+  loader: tweetLoader,
   schema: z.object({
     id: z.number(),
     username: z.string(),
@@ -31,4 +50,4 @@ const tweets = defineCollection({
 
 
 // Export a single `collections` object to register your collection(s)
-export const collections = { tweets };
\ No newline at end of file
+export const collections = { tweets };
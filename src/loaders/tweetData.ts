@@ -0,0 +1,51 @@
+// Content loader for the data files written by build/sql_extraction.py --output-format json/ndjson
+import type { Loader } from 'astro/loaders';
+import { readdir, readFile } from 'node:fs/promises';
+import { join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+// One record per tweet: the frontmatter fields plus the tweet text as "body"
+type TweetRecord = Record<string, unknown> & { body?: string };
+
+interface TweetDataOptions {
+  // Directory of the data files, relative to the project root
+  base: string;
+}
+
+function parseRecords(filename: string, text: string): TweetRecord[] {
+  if (filename.endsWith('.ndjson')) {
+    return text.split('\n').filter(line => line.trim()).map(line => JSON.parse(line));
+  }
+  return JSON.parse(text);
+}
+
+/**
+ * Loads all tweets from a directory of JSON (array) or NDJSON files.
+ * Entries look like those of the markdown files: the id is the tweetID,
+ * `data` holds the frontmatter fields and `body` the tweet text.
+ */
+export function tweetData({ base }: TweetDataOptions): Loader {
+  return {
+    name: 'tweet-data',
+    load: async ({ store, parseData, generateDigest, logger, config }) => {
+      const directory = fileURLToPath(new URL(base.endsWith('/') ? base : `${base}/`, config.root));
+      const filenames = (await readdir(directory))
+        // Skip the export manifest (.export-manifest.json)
+        .filter(filename => !filename.startsWith('.'))
+        .filter(filename => filename.endsWith('.json') || filename.endsWith('.ndjson'))
+        .sort();
+
+      store.clear();
+      for (const filename of filenames) {
+        const records = parseRecords(filename, await readFile(join(directory, filename), 'utf-8'));
+        for (const record of records) {
+          const { body = '', ...fields } = record;
+          const id = String(fields.tweetID ?? fields.id);
+          const data = await parseData({ id, data: fields });
+          store.set({ id, data, body, digest: generateDigest(record) });
+        }
+      }
+      logger.info(`Loaded ${store.keys().length} tweets from ${filenames.length} data files`);
+    },
+  };
+}
@@ -7,7 +7,8 @@ import { getCollection } from "astro:content";
  */
 function transformTweetsForSearch(tweets) {
   return tweets.map((tweet) => ({
-    slug: tweet.slug,
+    // Collections with a loader have no slug, their id is the tweetID
+    slug: tweet.slug ?? tweet.id,
     url: tweet.url,
     content: tweet.body,
     date: tweet.data.createdAt || tweet.data.pubDate,
@@ -25,8 +25,9 @@ export class SearchPageController {
   private updateSearchReadout(searchTerm: string, paginatedResults?: PaginatedResults): void {
     if (this.searchReadout) {
       if (searchTerm && paginatedResults) {
-        const { totalResults, currentPage, totalPages } = paginatedResults;
-        this.searchReadout.textContent = `${searchConfig.text.resultsTitle} "${searchTerm}" - ${totalResults} results (Page ${currentPage} of ${totalPages})`;
+        const { totalResults, totalIsExact, currentPage, totalPages } = paginatedResults;
+        const count = totalIsExact ? `${totalResults}` : `${totalResults}+`;
+        this.searchReadout.textContent = `${searchConfig.text.resultsTitle} "${searchTerm}" - ${count} results (Page ${currentPage} of ${totalPages}${totalIsExact ? '' : '+'})`;
       } else if (searchTerm) {
         this.searchReadout.textContent = `${searchConfig.text.resultsTitle} "${searchTerm}"`;
       } else {
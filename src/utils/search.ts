@@ -3,6 +3,7 @@ import DOMPurify from 'dompurify';
 import Fuse from 'fuse.js';
 import { marked } from 'marked';
 import { searchConfig } from '../config/search';
+import { PrebuiltSearchIndex } from './searchIndex';
 
 export interface SearchItem {
   slug?: string;
@@ -27,6 +28,8 @@ export interface SearchResult {
 export interface PaginatedResults {
   results: SearchResult[];
   totalResults: number;
+  // False when totalResults only counts the matches found so far
+  totalIsExact: boolean;
   currentPage: number;
   totalPages: number;
   hasNextPage: boolean;
@@ -36,6 +39,7 @@ export interface PaginatedResults {
 export class SearchManager {
   private searchData: SearchItem[] | null = null;
   private fuseInstance: Fuse<SearchItem> | null = null;
+  private prebuiltIndex: Promise<PrebuiltSearchIndex | null> | null = null;
 
   /**
    * Sanitizes user input to prevent XSS attacks
@@ -85,6 +89,16 @@ export class SearchManager {
     }
   }
 
+  /**
+   * Loads the prebuilt search index once, resolves to null if it is not deployed
+   */
+  loadPrebuiltIndex(): Promise<PrebuiltSearchIndex | null> {
+    if (!this.prebuiltIndex) {
+      this.prebuiltIndex = PrebuiltSearchIndex.load(searchConfig.endpoints.searchIndex);
+    }
+    return this.prebuiltIndex;
+  }
+
   /**
    * Initializes the Fuse search instance
    */
@@ -108,6 +122,7 @@ export class SearchManager {
       return {
         results: [],
         totalResults: 0,
+        totalIsExact: true,
         currentPage: page,
         totalPages: 0,
         hasNextPage: false,
@@ -115,29 +130,50 @@ export class SearchManager {
       };
     }
 
-    await this.initializeFuse();
-    
-    if (!this.fuseInstance) {
-      throw new Error('Search instance not available');
-    }
-
-    console.log(`Searching for: "${sanitizedTerm}"`);
-    const allResults = this.fuseInstance.search(sanitizedTerm);
-    console.log('Total search results:', allResults.length);
-    
     // Calculate pagination
-    const totalResults = allResults.length;
-    const totalPages = Math.ceil(totalResults / searchConfig.resultsPerPage);
     const startIndex = (page - 1) * searchConfig.resultsPerPage;
     const endIndex = startIndex + searchConfig.resultsPerPage;
-    const results: SearchResult[] = allResults.slice(startIndex, endIndex).map(res => ({
-      item: res.item,
-      score: res.score ?? 0
-    }));
+    let totalResults: number;
+    let totalIsExact = true;
+    let results: SearchResult[];
+
+    console.log(`Searching for: "${sanitizedTerm}"`);
+    const prebuiltIndex = await this.loadPrebuiltIndex();
+
+    if (prebuiltIndex) {
+      // Only the postings and documents up to the current page are fetched,
+      // one more match tells whether there is a next page
+      const { matches, total, exact } = await prebuiltIndex.search(sanitizedTerm, endIndex + 1);
+      const pageMatches = matches.slice(startIndex, endIndex);
+      const items = await prebuiltIndex.getDocuments(pageMatches.map(match => match.docId));
+      totalResults = Math.max(total, matches.length);
+      totalIsExact = exact;
+      results = pageMatches.map((match, i) => ({
+        item: items[i],
+        score: match.score
+      }));
+    } else {
+      await this.initializeFuse();
+
+      if (!this.fuseInstance) {
+        throw new Error('Search instance not available');
+      }
+
+      const allResults = this.fuseInstance.search(sanitizedTerm);
+      totalResults = allResults.length;
+      results = allResults.slice(startIndex, endIndex).map(res => ({
+        item: res.item,
+        score: res.score ?? 0
+      }));
+    }
+    console.log('Total search results:', totalResults);
+
+    const totalPages = Math.ceil(totalResults / searchConfig.resultsPerPage);
     
     return {
       results,
       totalResults,
+      totalIsExact,
       currentPage: page,
       totalPages,
       hasNextPage: page < totalPages,
@@ -0,0 +1,389 @@
+// Client for the prebuilt search index generated by build/search_index.py
+import type { SearchItem } from './search';
+
+// Must stay in sync with build/search_index.py
+const INDEX_VERSION = 2;
+const TOKEN_PATTERN = /[\p{L}\p{N}_]+/gu;
+
+// Terms that only start with a query word count less than exact matches
+const PREFIX_MATCH_WEIGHT = 0.5;
+
+// Postings read per query word and round, before checking whether the top results are known
+const POSTINGS_PER_ROUND = 1000;
+
+// Rounds of posting blocks read at most for a query
+const MAX_ROUNDS = 8;
+
+// Documents checked against their text per round once MAX_ROUNDS are read, and rounds of checks
+const CHECKS_PER_ROUND = 10;
+const MAX_CHECK_ROUNDS = 3;
+
+export interface SearchIndexMeta {
+  version: number;
+  docCount: number;
+  docsPerShard: number;
+  prefixLength: number;
+  blockSize: number;
+  minTermLength: number;
+  maxTermLength: number;
+  termShards: Record<string, string>;
+}
+
+export interface IndexMatch {
+  docId: number;
+  score: number;
+}
+
+export interface IndexResults {
+  // The best matches, at most as many as requested
+  matches: IndexMatch[];
+  // Number of matching documents, a lower bound unless exact is set
+  total: number;
+  exact: boolean;
+}
+
+// Term -> [document count, highest term frequency, file, position of the first block]
+type TermShard = Record<string, [number, number, number, number]>;
+
+// Posting blocks of a file, each a flat list [doc id delta, term frequency, ...]
+type PostingFile = number[][];
+
+// Reading position in the postings of one term
+interface TermCursor {
+  term: string;
+  word: number;
+  weight: number;
+  idf: number;
+  remaining: number;
+  // Term frequency the unread postings do not exceed
+  maxTf: number;
+  file: number;
+  position: number;
+}
+
+/**
+ * Splits text into lowercase search terms, like tokenize() in build/search_index.py
+ */
+export function tokenize(text: string, meta: SearchIndexMeta): string[] {
+  const terms = text.toLowerCase().match(TOKEN_PATTERN) || [];
+  return terms.filter(term => term.length >= meta.minTermLength && term.length <= meta.maxTermLength);
+}
+
+export class PrebuiltSearchIndex {
+  private termShards = new Map<string, Promise<TermShard | null>>();
+  private postingFiles = new Map<number, Promise<PostingFile>>();
+  private docShards = new Map<number, Promise<SearchItem[]>>();
+
+  constructor(private baseUrl: string, private meta: SearchIndexMeta) {}
+
+  /**
+   * Loads the index metadata, returns null if no usable index is deployed
+   */
+  static async load(baseUrl: string): Promise<PrebuiltSearchIndex | null> {
+    try {
+      const response = await fetch(`${baseUrl}/meta.json`);
+      if (!response.ok) {
+        return null;
+      }
+
+      const meta: SearchIndexMeta = await response.json();
+      if (meta.version !== INDEX_VERSION) {
+        console.warn(`Unsupported search index version ${meta.version}`);
+        return null;
+      }
+      return new PrebuiltSearchIndex(baseUrl, meta);
+    } catch (error) {
+      console.warn('Prebuilt search index not available:', error);
+      return null;
+    }
+  }
+
+  private async fetchJSON<T>(path: string): Promise<T> {
+    const response = await fetch(`${this.baseUrl}/${path}`);
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Fetches the shard holding all terms with the given prefix (once per prefix)
+   */
+  private loadTermShard(prefix: string): Promise<TermShard | null> {
+    let shard = this.termShards.get(prefix);
+    if (!shard) {
+      const filename = this.meta.termShards[prefix];
+      shard = filename ? this.fetchJSON<TermShard>(`terms/${filename}`) : Promise.resolve(null);
+      this.termShards.set(prefix, shard);
+    }
+    return shard;
+  }
+
+  /**
+   * Fetches a file of posting blocks (once per file)
+   */
+  private loadPostingFile(fileId: number): Promise<PostingFile> {
+    let file = this.postingFiles.get(fileId);
+    if (!file) {
+      file = this.fetchJSON<PostingFile>(`postings/p${String(fileId).padStart(5, '0')}.json`);
+      this.postingFiles.set(fileId, file);
+    }
+    return file;
+  }
+
+  /**
+   * Fetches a chunk of documents (once per chunk)
+   */
+  private loadDocShard(shardId: number): Promise<SearchItem[]> {
+    let shard = this.docShards.get(shardId);
+    if (!shard) {
+      shard = this.fetchJSON<SearchItem[]>(`docs/d${String(shardId).padStart(5, '0')}.json`);
+      this.docShards.set(shardId, shard);
+    }
+    return shard;
+  }
+
+  /**
+   * Score of a posting: exact matches count more, and rare terms more than common ones
+   */
+  private static score(cursor: TermCursor, tf: number): number {
+    return cursor.weight * (1 + Math.log(tf)) * cursor.idf;
+  }
+
+  /**
+   * Finds the best matches of every word of the query, reading only as many
+   * posting blocks as needed to know the first `limit` results.
+   *
+   * Postings are sorted by term frequency, so the unread postings of a term
+   * score at most as much as the last one read. Blocks are read in rounds until
+   * `limit` documents match every word with a final score that no other
+   * document can reach anymore. Once all postings of a word are read, the few
+   * documents left undecided are checked against their text instead. After
+   * MAX_ROUNDS rounds, the most promising documents are checked for up to
+   * MAX_CHECK_ROUNDS rounds, then the documents seen with every word are
+   * ranked by the scores known so far. total is a lower bound unless exact.
+   * Scores are normalized like Fuse.js: 0 is the best match, 1 the worst.
+   */
+  async search(query: string, limit: number): Promise<IndexResults> {
+    const words = [...new Set(tokenize(query, this.meta))];
+    if (words.length === 0 || limit <= 0) {
+      return { matches: [], total: 0, exact: true };
+    }
+
+    const shards = await Promise.all(
+      words.map(word => this.loadTermShard(word.slice(0, this.meta.prefixLength)))
+    );
+
+    // One cursor per term that starts with a query word
+    const cursors: TermCursor[] = [];
+    // A single word matches at least as many documents as its most frequent term
+    let fewest = 0;
+    words.forEach((word, i) => {
+      for (const [term, [df, maxTf, file, position]] of Object.entries(shards[i] ?? {})) {
+        if (term.startsWith(word)) {
+          cursors.push({
+            term,
+            word: i,
+            weight: term === word ? 1 : PREFIX_MATCH_WEIGHT,
+            idf: Math.log(1 + this.meta.docCount / df),
+            remaining: df,
+            maxTf,
+            file,
+            position,
+          });
+          if (words.length === 1) {
+            fewest = Math.max(fewest, df);
+          }
+        }
+      }
+    });
+
+    // Best score per word of every document read so far, NaN where a word was not seen
+    const candidates = new Map<number, number[]>();
+    // Documents whose scores were taken from their text and are final
+    const checked = new Set<number>();
+
+    for (let round = 0; ; round++) {
+      // Highest score the unread postings of each word can still have
+      const bounds = words.map(() => 0);
+      const open = words.map(() => false);
+      for (const cursor of cursors) {
+        if (cursor.remaining > 0) {
+          open[cursor.word] = true;
+          bounds[cursor.word] = Math.max(bounds[cursor.word], PrebuiltSearchIndex.score(cursor, cursor.maxTf));
+        }
+      }
+
+      // Once every posting of a word is read, documents it did not contain can not match,
+      // and no document that was not read yet can match either
+      const closed = !open.every(Boolean);
+      for (const [docId, scores] of candidates) {
+        if (scores.some((score, i) => Number.isNaN(score) && !open[i])) {
+          candidates.delete(docId);
+        }
+      }
+
+      const final: IndexMatch[] = [];
+      const undecided: number[] = [];
+      let highestOpen = closed ? -Infinity : bounds.reduce((a, b) => a + b, 0);
+      for (const [docId, scores] of candidates) {
+        if (checked.has(docId) || scores.every((score, i) => score >= bounds[i] || !open[i])) {
+          final.push({ docId, score: scores.reduce((a, b) => a + b, 0) });
+        } else {
+          undecided.push(docId);
+          const highest = scores.reduce((sum, score, i) => sum + Math.max(Number.isNaN(score) ? 0 : score, bounds[i]), 0);
+          highestOpen = Math.max(highestOpen, highest);
+        }
+      }
+      final.sort((a, b) => b.score - a.score || a.docId - b.docId);
+
+      const exact = closed && undecided.length === 0;
+      if (exact || (final.length >= limit && final[limit - 1].score >= highestOpen)) {
+        return this.results(final, exact ? final.length : Math.max(final.length, fewest), limit, exact);
+      }
+
+      if (closed && undecided.length <= CHECKS_PER_ROUND) {
+        await this.checkDocuments(undecided, words, cursors, candidates);
+        undecided.forEach(docId => checked.add(docId));
+        continue;
+      }
+
+      if (round >= MAX_ROUNDS && round < MAX_ROUNDS + MAX_CHECK_ROUNDS) {
+        // Check the documents that could still score highest
+        const highest = (docId: number) => candidates.get(docId)!
+          .reduce((sum, score, i) => sum + Math.max(Number.isNaN(score) ? 0 : score, bounds[i]), 0);
+        const batch = undecided.sort((a, b) => highest(b) - highest(a)).slice(0, CHECKS_PER_ROUND);
+        await this.checkDocuments(batch, words, cursors, candidates);
+        batch.forEach(docId => checked.add(docId));
+        continue;
+      }
+
+      if (round >= MAX_ROUNDS) {
+        const found = [...candidates]
+          .filter(([, scores]) => !scores.some(Number.isNaN))
+          .map(([docId, scores]) => ({ docId, score: scores.reduce((a, b) => a + b, 0) }))
+          .sort((a, b) => b.score - a.score || a.docId - b.docId);
+        return this.results(found, Math.max(found.length, fewest), limit, false);
+      }
+
+      await this.readRound(words.length, cursors, candidates);
+    }
+  }
+
+  /**
+   * Returns the first `limit` matches with normalized scores
+   */
+  private results(sorted: IndexMatch[], total: number, limit: number, exact: boolean): IndexResults {
+    const matches = sorted.slice(0, limit);
+    const best = matches.length > 0 ? matches[0].score : 1;
+    return {
+      matches: matches.map(match => ({ docId: match.docId, score: 1 - match.score / best })),
+      total,
+      exact,
+    };
+  }
+
+  /**
+   * Reads the next block of the most promising terms of every word
+   */
+  private async readRound(wordCount: number, cursors: TermCursor[], candidates: Map<number, number[]>): Promise<void> {
+    const round: TermCursor[] = [];
+    for (let i = 0; i < wordCount; i++) {
+      const wordCursors = cursors
+        .filter(cursor => cursor.word === i && cursor.remaining > 0)
+        .sort((a, b) => PrebuiltSearchIndex.score(b, b.maxTf) - PrebuiltSearchIndex.score(a, a.maxTf));
+      let postings = 0;
+      for (const cursor of wordCursors) {
+        if (postings >= POSTINGS_PER_ROUND) {
+          break;
+        }
+        round.push(cursor);
+        postings += Math.min(cursor.remaining, this.meta.blockSize);
+      }
+    }
+
+    const files = new Map<number, PostingFile>();
+    await Promise.all([...new Set(round.map(cursor => cursor.file))].map(async fileId => {
+      files.set(fileId, await this.loadPostingFile(fileId));
+    }));
+
+    for (const cursor of round) {
+      const file = files.get(cursor.file)!;
+      const block = file[cursor.position];
+      let docId = 0;
+      for (let j = 0; j < block.length; j += 2) {
+        docId += block[j];
+        cursor.maxTf = block[j + 1];
+        const score = PrebuiltSearchIndex.score(cursor, cursor.maxTf);
+        let scores = candidates.get(docId);
+        if (!scores) {
+          scores = Array(wordCount).fill(NaN);
+          candidates.set(docId, scores);
+        }
+        if (Number.isNaN(scores[cursor.word]) || score > scores[cursor.word]) {
+          scores[cursor.word] = score;
+        }
+      }
+      cursor.remaining -= block.length / 2;
+      // The next block of the term follows, in the next file once this one ends
+      if (cursor.position + 1 < file.length) {
+        cursor.position++;
+      } else {
+        cursor.file++;
+        cursor.position = 0;
+      }
+    }
+  }
+
+  /**
+   * Scores documents from their text, like the index builder counts their terms.
+   * Documents that do not contain every word are removed from the candidates.
+   */
+  private async checkDocuments(docIds: number[], words: string[], cursors: TermCursor[],
+                               candidates: Map<number, number[]>): Promise<void> {
+    const termCursors = new Map(cursors.map(cursor => [`${cursor.word}:${cursor.term}`, cursor]));
+    const items = await this.getDocuments(docIds);
+
+    docIds.forEach((docId, index) => {
+      const counts = new Map<string, number>();
+      const item = items[index];
+      for (const term of [...tokenize(item.content ?? '', this.meta), ...tokenize(item.username ?? '', this.meta)]) {
+        counts.set(term, (counts.get(term) ?? 0) + 1);
+      }
+
+      const scores = words.map(() => NaN);
+      for (const [term, tf] of counts) {
+        words.forEach((word, i) => {
+          const cursor = termCursors.get(`${i}:${term}`);
+          if (cursor) {
+            const score = PrebuiltSearchIndex.score(cursor, tf);
+            if (Number.isNaN(scores[i]) || score > scores[i]) {
+              scores[i] = score;
+            }
+          }
+        });
+      }
+
+      if (scores.some(Number.isNaN)) {
+        candidates.delete(docId);
+      } else {
+        candidates.set(docId, scores);
+      }
+    });
+  }
+
+  /**
+   * Loads the documents for the given ids, fetching only the chunks they are in
+   */
+  async getDocuments(docIds: number[]): Promise<SearchItem[]> {
+    const perShard = this.meta.docsPerShard;
+    const shardIds = [...new Set(docIds.map(docId => Math.floor(docId / perShard)))];
+    const shards = new Map<number, SearchItem[]>();
+
+    await Promise.all(shardIds.map(async shardId => {
+      shards.set(shardId, await this.loadDocShard(shardId));
+    }));
+
+    return docIds.map(docId => shards.get(Math.floor(docId / perShard))![docId % perShard]);
+  }
+}